@@ -0,0 +1,154 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from .workloads import BENCHMARKS
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def calibrate(repeat=5):
+    '''
+    Time of a fixed pure-Python workload. Benchmark times are stored relative
+    to it so that baselines recorded on one machine apply to another
+    '''
+    def workload():
+        total = 0
+        for i in range(200000):
+            total += i % 7
+        return total
+    return min(_timeit(workload) for _ in range(repeat))
+
+
+def _timeit(run, *args):
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        run(*args)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def _with_setup(prepared):
+    if isinstance(prepared, tuple):
+        setup, run = prepared
+        return lambda: (setup(),), run
+    return lambda: (), prepared
+
+
+def measure(workload, size, repeat):
+    '''
+    A workload returns the run to measure, or (setup, run) when every run needs fresh input.
+    setup() is called before each run, outside the timed and traced region, and its result passed to run
+    :returns: (best time in seconds, peak traced memory in bytes) of one run
+    '''
+    setup, run = _with_setup(workload(size))
+    run(*setup())  # warm up
+    seconds = min(_timeit(run, *setup()) for _ in range(repeat))
+
+    args = setup()
+    tracemalloc.start()
+    run(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def run_benchmarks(quick=False, repeat=5, rounds=3, names=None):
+    '''
+    Run the whole suite rounds times and keep the best result of each benchmark,
+    which is far less sensitive to other load on the machine than any single run
+    :returns: {"<benchmark>[<size>]": {"relative_time": ..., "seconds": ..., "peak_bytes": ...}}
+    '''
+    results = {}
+    for _ in range(rounds):
+        for name, (workload, sizes, quick_sizes) in BENCHMARKS.items():
+            if names and name not in names:
+                continue
+            for size in (quick_sizes if quick else sizes):
+                # calibrated next to every benchmark to follow changes in machine load
+                calibration = calibrate()
+                seconds, peak = measure(workload, size, repeat)
+                key = f'{name}[{size}]'
+                best = results.get(key)
+                if best is None or seconds / calibration < best["relative_time"]:
+                    results[key] = {
+                        "relative_time": round(seconds / calibration, 4),
+                        "seconds": seconds,
+                        "peak_bytes": peak,
+                    }
+    return results
+
+
+# runs shorter than this and memory differences smaller than this are within noise
+MIN_SECONDS = 0.001
+MIN_PEAK_BYTES_DELTA = 16 * 1024
+
+
+def compare(results, baseline, threshold):
+    '''
+    :returns: descriptions of every result worse than its baseline by more than threshold
+    '''
+    regressions = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if not expected:
+            continue
+        if result["seconds"] >= MIN_SECONDS and result["relative_time"] > expected["relative_time"] * (1 + threshold):
+            regressions.append(f'{key} relative_time: {result["relative_time"]} vs baseline {expected["relative_time"]}')
+        if result["peak_bytes"] - expected["peak_bytes"] >= MIN_PEAK_BYTES_DELTA and \
+                result["peak_bytes"] > expected["peak_bytes"] * (1 + threshold):
+            regressions.append(f'{key} peak_bytes: {result["peak_bytes"]} vs baseline {expected["peak_bytes"]}')
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Micro-benchmarks of admission control and task models')
+    parser.add_argument('--quick', action='store_true', help='only run the small workload sizes')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per benchmark, the best one counts')
+    parser.add_argument('--rounds', type=int, default=3, help='runs of the whole suite, the best result counts')
+    parser.add_argument('--only', nargs='*', help='names of the benchmarks to run')
+    parser.add_argument(
+        '--threshold', type=float, default=0.5,
+        help='allowed slowdown / memory growth over the baseline, as a fraction'
+    )
+    parser.add_argument('--update-baseline', action='store_true', help=f'write the results to {BASELINE_PATH}')
+    args = parser.parse_args()
+
+    # keep logging cost out of the measurements
+    logging.disable(logging.CRITICAL)
+
+    results = run_benchmarks(quick=args.quick, repeat=args.repeat, rounds=args.rounds, names=args.only)
+    for key, result in results.items():
+        print(f'{key:<32} {result["seconds"] * 1000:>10.3f} ms {result["peak_bytes"] / 1024:>10.1f} KiB')
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH, 'r') as f:
+                baseline = json.load(f)
+        baseline.update({
+            key: {"relative_time": result["relative_time"], "peak_bytes": result["peak_bytes"]}
+            for key, result in results.items()
+        })
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Baseline updated: {BASELINE_PATH}')
+        sys.exit(0)
+
+    with open(BASELINE_PATH, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f'{len(regressions)} regressions beyond {args.threshold:.0%} of the baseline:')
+        for regression in regressions:
+            print(f'  {regression}')
+        sys.exit(1)
+    print('No regressions')
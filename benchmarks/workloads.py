@@ -0,0 +1,155 @@
+from datetime import datetime
+import copy
+import json
+from unittest.mock import patch
+from src.db.couchdb import CouchdbService
+from src.executor import Executor
+from src.task import Task, SubredditTask
+
+START = 1593526695.604652
+# hours since the last post of the subreddit records used by should_post
+RECORD_AGES_HOURS = [6, 16, 16, 32]
+
+
+class StubRedditService:
+    def is_on_frontpage(self, subreddit, category, threshold=10):
+        return False
+
+
+class StubDb:
+    '''
+    Db standing in for DbService, dropping all writes
+    '''
+    def __getattr__(self, name):
+        return self
+
+    def update_fields(self, id, fields):
+        pass
+
+    def update(self, doc):
+        pass
+
+
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self._body = body
+
+    def json(self):
+        return json.loads(self._body)
+
+
+def _subreddit_records(size, now):
+    '''
+    Records landing on every branch of admission control: within min delay,
+    predicted from turnover, probed and beyond max delay (for the default 12h / 24h delays)
+    '''
+    records = []
+    for i in range(size):
+        age_hours = RECORD_AGES_HOURS[i % len(RECORD_AGES_HOURS)]
+        record = {"_id": f"subreddit{i}", "lastPostedTimestamp": now - age_hours * 3600}
+        if i % len(RECORD_AGES_HOURS) == 1:
+            record["turnover"] = {"on": [1.0, 2.0, 3.0], "off": [5.0, 6.0, 7.0, 8.0, 9.0]}
+        records.append(record)
+    return records
+
+
+def _task(id, subreddits):
+    return Task(
+        id=id,
+        link="https://fake-link.com",
+        crosspost_source_link="https://reddit.com/fake-post",
+        reply_content="sample reply",
+        subreddits=[
+            SubredditTask(name=f"subreddit{i}", flair_id="fake-flair-id" if i % 2 else "")
+            for i in range(subreddits)
+        ]
+    )
+
+
+def _processed_task_dict(id, subreddits):
+    '''
+    Task document with a deep processing history
+    '''
+    task = _task(id, subreddits)
+    for i, subreddit in enumerate(task.subreddits):
+        if i % 3:
+            task.update_on_success(subreddit, START + i, f"https://www.reddit.com/r/subreddit{i}/comments/abc{i}/title/")
+        else:
+            task.update_on_error(subreddit, START + i, Exception("SUBMIT_VALIDATION_FLAIR_REQUIRED: flair required"))
+    return Task.to_dict(task)
+
+
+def should_post(size):
+    executor = Executor(StubRedditService(), StubDb(), turnover_verify_rate=0)
+    records = _subreddit_records(size, START)
+    now = datetime.fromtimestamp(START)
+
+    def setup():
+        # probes learn turnover into the records, every run starts from fresh copies
+        # so that it takes the same branches as the first one
+        return copy.deepcopy(records)
+
+    def run(records):
+        for record in records:
+            executor._should_post(record, now)
+    return setup, run
+
+
+def get_operations(size):
+    executor = Executor(StubRedditService(), StubDb())
+    tasks = [_task(str(i), 1) for i in range(size)]
+
+    def run():
+        for task in tasks:
+            executor._get_operations(task)
+    return run
+
+
+def task_from_dict(size):
+    task_dict = _processed_task_dict("1", size)
+
+    def run():
+        Task.from_dict(task_dict)
+    return run
+
+
+def task_to_dict(size):
+    task = Task.from_dict(_processed_task_dict("1", size))
+
+    def run():
+        Task.to_dict(task)
+    return run
+
+
+def update_on_success(size):
+    def run():
+        task = _task("1", size)
+        for i, subreddit in enumerate(task.subreddits):
+            task.update_on_success(subreddit, START + i, "https://www.reddit.com/r/subreddit/comments/abc/title/")
+    return run
+
+
+def couchdb_marshalling(size):
+    couchdb = CouchdbService("http://127.0.0.1:5984", "", "")
+    task_dict = _processed_task_dict("1", size)
+
+    def fake_request(verb, auth, headers, url, data):
+        return StubResponse(data)
+
+    def run():
+        with patch('src.db.couchdb.couchdb.requests.request', fake_request):
+            couchdb._call_api('/tasks/1', verb='PUT', data=task_dict).json()
+    return run
+
+
+# name -> (workload, sizes, sizes used with --quick)
+BENCHMARKS = {
+    "should_post": (should_post, [1, 100, 10000, 100000], [1, 100]),
+    "get_operations": (get_operations, [1, 100, 10000, 100000], [1, 100]),
+    "task_from_dict": (task_from_dict, [1, 100, 10000], [1, 100]),
+    "task_to_dict": (task_to_dict, [1, 100, 10000], [1, 100]),
+    "update_on_success": (update_on_success, [1, 100, 1000], [1, 100]),
+    "couchdb_marshalling": (couchdb_marshalling, [1, 100, 10000], [1, 100]),
+}
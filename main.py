@@ -1,26 +1,36 @@
-import logging
+import argparse
+import time
 import praw
 import yaml
 from src.reddit import RedditService
 from src.db import DbService
 from src.db.couchdb import CouchdbService
 from src.executor import Executor
-import coloredlogs
-
-
-def configure_logging():
-    coloredlogs.install(
-        level='INFO',
-        fmt='%(asctime)s, %(levelname)s %(message)s',
-        logger=logging.getLogger()
-    )
+from src.archive import TaskArchiver
+from src.health import PostHealthSweeper
+from src.logs import configure_logging
+from src.jobs import ReplyQueue, ReplyWorkerPool
+from src.snapshot import ExecutorSnapshot
 
 
 with open("configs.yaml", 'r') as stream:
     config = yaml.safe_load(stream)
 
 
-reddit = RedditService(praw.Reddit())
+praw_reddit = praw.Reddit()
+
+snapshot_config = config.get('snapshot', {})
+snapshot = None
+warm_state = None
+if snapshot_config.get('enabled', False):
+    snapshot = ExecutorSnapshot(
+        snapshot_config.get('path', 'snapshot.json.gz'),
+        max_age_hours=snapshot_config.get('max_age_hours', 24)
+    )
+    # only trusted for the account configured in praw.ini, unknown without password auth
+    warm_state = snapshot.load(time.time(), praw_reddit.config.username or None)
+
+reddit = RedditService(praw_reddit, username=warm_state.get('username') if warm_state else None)
 
 couchdb_engine = CouchdbService(
     url=config['couchdb']['host'],
@@ -29,17 +39,70 @@ couchdb_engine = CouchdbService(
 )
 db = DbService(couchdb_engine)
 
+replies_config = config.get('replies', {})
+reply_queue = ReplyQueue(replies_config.get('queue_path', 'replies.db'))
+
 if __name__ == "__main__":
-    configure_logging()
-
-    app_config = config['app']
-    executor = Executor(
-        reddit=reddit,
-        db=db,
-        running_window=(app_config['running_window_start_hour'], app_config['running_window_end_hour']),
-        min_reposting_delay=app_config['min_reposting_delay'],
-        max_reposting_delay=app_config['max_reposting_delay'],
-        subreddit_frontpage_shreshold=app_config['subreddit_frontpage_shreshold'],
-        run_interval_seconds=app_config['run_interval_seconds']
+    parser = argparse.ArgumentParser(description='Reddit Autopilot')
+    parser.add_argument(
+        '--replies-only', action='store_true',
+        help='only process scheduled replies, without making any new posts'
     )
-    executor.run()
+    args = parser.parse_args()
+
+    configure_logging(config.get('logging', {}))
+
+    reply_workers = ReplyWorkerPool(
+        lambda: reddit.fork(praw.Reddit()), reply_queue,
+        workers=max(replies_config.get('workers', 1), 1),
+        batch_size=replies_config.get('batch_size', 10),
+        max_retries=replies_config.get('max_retries', 10),
+        retry_delay=replies_config.get('retry_delay_seconds', 300)
+    )
+    if args.replies_only:
+        reply_workers.run()
+    else:
+        if replies_config.get('workers', 1) > 0:
+            reply_workers.start()
+
+        archive_config = config.get('archive', {})
+        archiver = None
+        if archive_config.get('enabled', False):
+            archiver = TaskArchiver(
+                db, archive_config.get('dir', 'archive'),
+                archive_after_hours=archive_config.get('archive_after_hours', 168)
+            )
+
+        post_health_config = config.get('post_health', {})
+        post_health = None
+        if post_health_config.get('enabled', False):
+            post_health = PostHealthSweeper(
+                reddit, db,
+                lookback_hours=post_health_config.get('lookback_hours', 72),
+                min_posts=post_health_config.get('min_posts', 3),
+                removal_ratio=post_health_config.get('removal_ratio', 0.5)
+            )
+
+        app_config = config['app']
+        executor = Executor(
+            reddit=reddit,
+            db=db,
+            running_window=(app_config['running_window_start_hour'], app_config['running_window_end_hour']),
+            min_reposting_delay=app_config['min_reposting_delay'],
+            max_reposting_delay=app_config['max_reposting_delay'],
+            subreddit_frontpage_shreshold=app_config['subreddit_frontpage_shreshold'],
+            run_interval_seconds=app_config['run_interval_seconds'],
+            capability_ttl_hours=app_config.get('capability_ttl_hours', 168),
+            reply_queue=reply_queue,
+            archiver=archiver,
+            submission_history_limit=app_config.get('submission_history_limit', 1000),
+            turnover_min_samples=app_config.get('turnover_min_samples', 3),
+            turnover_verify_rate=app_config.get('turnover_verify_rate', 0.1),
+            scheduling_policy=app_config.get('scheduling_policy', 'round_robin'),
+            post_health=post_health,
+            removal_backoff_hours=post_health_config.get('backoff_hours', 72),
+            snapshot=snapshot
+        )
+        if warm_state:
+            executor.restore_state(warm_state)
+        executor.run()
@@ -0,0 +1,75 @@
+import argparse
+from datetime import datetime
+import json
+import logging
+import yaml
+from src.simulator import Simulation
+
+SNAPSHOT_DBS = ["tasks", "subreddits", "capabilities"]
+
+
+def load_snapshot_from_couchdb(config):
+    from src.db.couchdb import CouchdbService
+
+    couchdb_engine = CouchdbService(
+        url=config['couchdb']['host'],
+        user=config['couchdb']['username'],
+        password=config['couchdb']['password']
+    )
+    return {name: list(couchdb_engine.db(name).iter_docs({})) for name in SNAPSHOT_DBS}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Project how the current tasks would be posted with the settings in configs.yaml'
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        '--snapshot',
+        help='JSON file mapping db names (tasks, subreddits, capabilities) to lists of documents'
+    )
+    source.add_argument('--from-couchdb', action='store_true', help='take a snapshot of the configured CouchDB')
+    parser.add_argument('--save-snapshot', help='write the snapshot used to this file')
+    parser.add_argument('--start', help='virtual start time as YYYY-MM-DD HH:MM (default: now)')
+    parser.add_argument('--days', type=int, default=30, help='simulation horizon in days')
+    parser.add_argument(
+        '--frontpage-hours', type=float, default=6,
+        help='how long a submission is assumed to stay in the top listings of its subreddit'
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    with open("configs.yaml", 'r') as stream:
+        config = yaml.safe_load(stream)
+
+    if args.from_couchdb:
+        snapshot = load_snapshot_from_couchdb(config)
+    else:
+        with open(args.snapshot, 'r') as f:
+            snapshot = json.load(f)
+
+    if args.save_snapshot:
+        with open(args.save_snapshot, 'w') as f:
+            json.dump(snapshot, f)
+
+    start = datetime.strptime(args.start, '%Y-%m-%d %H:%M') if args.start else datetime.now()
+
+    app_config = config['app']
+    simulation = Simulation(
+        snapshot, start.timestamp(),
+        executor_options=dict(
+            running_window=(app_config['running_window_start_hour'], app_config['running_window_end_hour']),
+            min_reposting_delay=app_config['min_reposting_delay'],
+            max_reposting_delay=app_config['max_reposting_delay'],
+            subreddit_frontpage_shreshold=app_config['subreddit_frontpage_shreshold'],
+            run_interval_seconds=app_config['run_interval_seconds'],
+            capability_ttl_hours=app_config.get('capability_ttl_hours', 168),
+            turnover_min_samples=app_config.get('turnover_min_samples', 3),
+            turnover_verify_rate=app_config.get('turnover_verify_rate', 0.1),
+            scheduling_policy=app_config.get('scheduling_policy', 'round_robin')
+        ),
+        frontpage_hours=args.frontpage_hours
+    )
+    drain_seconds = simulation.run(args.days)
+    print(simulation.report(drain_seconds))
@@ -0,0 +1,103 @@
+from datetime import datetime
+import gzip
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TaskArchiver:
+    '''
+    Move completed tasks out of the tasks db into append-only gzipped
+    newline-delimited JSON files (one per month), keeping a compact summary
+    of every archived task in the task_archive db.
+    Compaction of the tasks db is started afterwards to reclaim the space.
+    It runs in the background, the space reclaimed is measured by a later run
+    '''
+    def __init__(self, db, archive_dir, archive_after_hours=168, batch_size=100):
+        self._db = db
+        self._archive_dir = archive_dir
+        self._archive_after_hours = archive_after_hours
+        self._batch_size = batch_size
+        # size of the tasks db when the pending compaction was started
+        self._size_before_compaction = None
+
+    @staticmethod
+    def _summary(task_dict, archive_file, timestamp):
+        '''
+        Summary kept queryable for an archived task: where each post was made
+        '''
+        return {
+            "_id": task_dict['_id'],
+            "link": task_dict.get('link', ""),
+            "archive_file": archive_file,
+            "archived_timestamp": timestamp,
+            "posts": [
+                {
+                    "subreddit": subreddit.get('name', ""),
+                    "link": subreddit['link'],
+                    "timestamp": subreddit.get('timestamp', ""),
+                    "operation": subreddit.get('operation', "")
+                }
+                for subreddit in task_dict.get('subreddits', []) if subreddit.get('link')
+            ]
+        }
+
+    def _archive_batch(self, tasks, archive_file, timestamp):
+        os.makedirs(self._archive_dir, exist_ok=True)
+        # Tasks are written to the archive before they are removed from the db
+        # so an interrupted run could only leave duplicates behind, never lose tasks
+        with gzip.open(os.path.join(self._archive_dir, archive_file), 'at', encoding='utf-8') as f:
+            for task_dict in tasks:
+                archived = {k: v for k, v in task_dict.items() if k != '_rev'}
+                f.write(json.dumps(archived, separators=(',', ':')) + '\n')
+
+        for task_dict in tasks:
+            self._db.task_archive.upsert(task_dict['_id'], TaskArchiver._summary(task_dict, archive_file, timestamp))
+            self._db.task.delete(task_dict)
+
+    def _start_compaction(self):
+        if self._size_before_compaction is not None:
+            return
+        self._size_before_compaction = self._db.task.file_size()
+        self._db.task.compact()
+
+    def _finished_compaction(self):
+        '''
+        :returns: bytes reclaimed by the compaction started by an earlier run,
+        0 if there is none or it is still running
+        '''
+        if self._size_before_compaction is None or self._db.task.is_compacting():
+            return 0
+        reclaimed = max(self._size_before_compaction - self._db.task.file_size(), 0)
+        self._size_before_compaction = None
+        logger.info(f'[Archive] Compaction of tasks db finished. Reclaimed {reclaimed // 1024} KiB')
+        return reclaimed
+
+    def run(self):
+        '''
+        Archive every task completed more than archive_after_hours ago
+        :returns: (number of archived tasks, bytes reclaimed by the compaction an earlier run started)
+        '''
+        reclaimed = self._finished_compaction()
+        now = time.time()
+        cutoff = now - self._archive_after_hours * 3600
+        archive_file = f'tasks-{datetime.fromtimestamp(now):%Y-%m}.ndjson.gz'
+
+        archived = 0
+        while True:
+            tasks = self._db.task.get_completed_before(cutoff, self._batch_size)
+            if not tasks:
+                break
+            self._archive_batch(tasks, archive_file, now)
+            archived += len(tasks)
+
+        if not archived:
+            logger.info('[Archive] No completed tasks to archive')
+            return 0, reclaimed
+
+        self._start_compaction()
+        logger.info(f'[Archive] Archived {archived} completed tasks to [{archive_file}]. Compacting tasks db')
+        return archived, reclaimed
@@ -0,0 +1,56 @@
+CROSSPOST_FORBIDDEN = "crosspost_forbidden"
+NSFW_CROSSPOST_FORBIDDEN = "nsfw_crosspost_forbidden"
+FLAIR_REQUIRED = "flair_required"
+LINK_FORBIDDEN = "link_forbidden"
+BANNED = "banned"
+# learned from post health sweeps rather than API errors
+SILENTLY_REMOVES = "silently_removes"
+
+# Reddit API error types that reveal a long-lived property of a subreddit
+REDDIT_API_ERROR_FACTS = {
+    "NO_CROSSPOSTS": CROSSPOST_FORBIDDEN,
+    "OVER18_SUBREDDIT_CROSSPOST": NSFW_CROSSPOST_FORBIDDEN,
+    "SUBMIT_VALIDATION_FLAIR_REQUIRED": FLAIR_REQUIRED,
+    "NO_LINKS": LINK_FORBIDDEN,
+    "SUBREDDIT_NOTALLOWED": BANNED,
+}
+
+
+class SubredditCapability:
+    '''
+    Facts learned about a subreddit from earlier Reddit API rejections.
+    Each fact expires at a given unix timestamp so that changes to
+    subreddit rules (or lifted bans) are eventually picked up again
+    '''
+    def __init__(self, name, facts=None):
+        self.name = name
+        # fact -> unix timestamp when the fact expires
+        self.facts = facts if facts is not None else {}
+
+    @classmethod
+    def from_dict(cls, dict):
+        return cls(
+            name=dict.get('_id', ""),
+            facts=dict.get('facts', {})
+        )
+
+    @classmethod
+    def to_dict(cls, obj):
+        return {
+            "_id": obj.name,
+            "facts": dict(obj.facts)
+        }
+
+    @staticmethod
+    def fact_from_error(error_type):
+        return REDDIT_API_ERROR_FACTS.get(error_type)
+
+    def learn(self, fact, timestamp, ttl_hours):
+        self.facts[fact] = timestamp + ttl_hours * 3600
+
+    def has(self, fact, timestamp):
+        expires_at = self.facts.get(fact)
+        return expires_at is not None and timestamp < expires_at
+
+    def __repr__(self):
+        return str(self.__dict__)
@@ -72,8 +72,10 @@ class CouchdbService:
         newobj._setup()
         return newobj
 
-    def get_docs(self, filter):
+    def get_docs(self, filter, limit=None):
         selector = CouchdbService._selector(filter)
+        if limit is not None:
+            selector['limit'] = limit
         r = self._call_api(f'/{self._db_name}/_find', verb='POST', data=selector)
         self._check_error(
             r,
@@ -81,6 +83,25 @@ class CouchdbService:
         )
         return r.json()['docs']
 
+    def iter_docs(self, filter, page_size=1000):
+        '''
+        Iterate over all documents matching the filter, page by page
+        (a single _find request returns 25 documents unless limited otherwise)
+        '''
+        selector = CouchdbService._selector(filter)
+        selector['limit'] = page_size
+        while True:
+            r = self._call_api(f'/{self._db_name}/_find', verb='POST', data=selector)
+            self._check_error(
+                r,
+                err_msg=f'Failed to get documents for db {self._db_name}',
+            )
+            result = r.json()
+            yield from result['docs']
+            if len(result['docs']) < page_size:
+                break
+            selector['bookmark'] = result['bookmark']
+
     def get_doc_by_id(self, id):
         docs = self.get_docs({
             '_id': id
@@ -108,6 +129,25 @@ class CouchdbService:
             err_msg=f'Failed to update doc for db {self._db_name} with id {id} & rev {rev}',
         )
 
+    def merge_doc(self, id, fields):
+        '''
+        Update only the given fields of a document, creating it if needed
+        '''
+        existing_record = self.get_doc_by_id(id)
+
+        if not existing_record:
+            self.create_doc(id, dict(fields, _id=id))
+            return
+
+        rev = existing_record['_rev']
+        new_doc = dict(existing_record, **fields)
+
+        r = self._call_api(f'/{self._db_name}/{id}?rev={rev}', verb='PUT', data=new_doc)
+        self._check_error(
+            r,
+            err_msg=f'Failed to update doc for db {self._db_name} with id {id} & rev {rev}',
+        )
+
     def upsert_doc(self, id, doc):
         existing_record = self.get_doc_by_id(id)
 
@@ -117,3 +157,32 @@ class CouchdbService:
             if "_id" not in doc:
                 doc['_id'] = id
             self.update_doc(doc)
+
+    def delete_doc(self, id, rev):
+        r = self._call_api(f'/{self._db_name}/{id}?rev={rev}', verb='DELETE')
+        self._check_error(
+            r,
+            err_msg=f'Failed to delete doc for db {self._db_name} with id {id} & rev {rev}',
+        )
+
+    def info(self):
+        r = self._call_api(f'/{self._db_name}')
+        self._check_error(
+            r,
+            err_msg=f'Failed to get info for db {self._db_name}',
+        )
+        return r.json()
+
+    def file_size(self):
+        info = self.info()
+        return info.get('sizes', {}).get('file', info.get('disk_size', 0))
+
+    def compact(self):
+        r = self._call_api(f'/{self._db_name}/_compact', verb='POST')
+        self._check_error(
+            r,
+            err_msg=f'Failed to start compaction for db {self._db_name}',
+        )
+
+    def is_compacting(self):
+        return self.info().get('compact_running', False)
@@ -10,6 +10,18 @@ class DbService:
             self._db_engine.db("subreddits")
         )
 
+        self.subreddit_capability = SubredditCapabilityDbService(
+            self._db_engine.db("capabilities")
+        )
+
+        self.task_archive = TaskArchiveDbService(
+            self._db_engine.db("task_archive")
+        )
+
+        self.post_health = PostHealthDbService(
+            self._db_engine.db("post_health")
+        )
+
 
 class TaskDbService:
     def __init__(self, db):
@@ -22,13 +34,39 @@ class TaskDbService:
         return self.db.get_doc_by_id(id)
 
     def get_uncompleted(self):
-        return self.db.get_docs({
+        return list(self.db.iter_docs({
             "completed": False
+        }))
+
+    def get_all(self):
+        return self.db.iter_docs({})
+
+    def get_updated_since(self, timestamp):
+        return self.db.iter_docs({
+            "last_updated_timestamp": {"$gte": timestamp}
         })
 
+    def get_completed_before(self, timestamp, limit):
+        return self.db.get_docs({
+            "completed": True,
+            "last_updated_timestamp": {"$lt": timestamp}
+        }, limit=limit)
+
     def update(self, new_task):
         self.db.update_doc(new_task)
 
+    def delete(self, task):
+        self.db.delete_doc(task['_id'], task['_rev'])
+
+    def file_size(self):
+        return self.db.file_size()
+
+    def compact(self):
+        self.db.compact()
+
+    def is_compacting(self):
+        return self.db.is_compacting()
+
 
 class SubredditLastPostedDbService:
     def __init__(self, db):
@@ -39,3 +77,42 @@ class SubredditLastPostedDbService:
 
     def upsert(self, id, new_record):
         self.db.upsert_doc(id, new_record)
+
+    def update_fields(self, id, fields):
+        self.db.merge_doc(id, fields)
+
+
+class SubredditCapabilityDbService:
+    def __init__(self, db):
+        self.db = db
+
+    def get(self, id):
+        return self.db.get_doc_by_id(id)
+
+    def upsert(self, id, new_record):
+        self.db.upsert_doc(id, new_record)
+
+
+class TaskArchiveDbService:
+    def __init__(self, db):
+        self.db = db
+
+    def get(self, id):
+        return self.db.get_doc_by_id(id)
+
+    def get_all(self):
+        return self.db.iter_docs({})
+
+    def upsert(self, id, summary):
+        self.db.upsert_doc(id, summary)
+
+
+class PostHealthDbService:
+    def __init__(self, db):
+        self.db = db
+
+    def get(self, id):
+        return self.db.get_doc_by_id(id)
+
+    def upsert(self, id, record):
+        self.db.upsert_doc(id, record)
@@ -0,0 +1,82 @@
+import urllib.parse
+from .task import DIRECT_POST
+
+# query parameters that do not change the target of a link
+TRACKING_QUERY_PARAMS = {"fbclid", "gclid", "ref", "ref_src"}
+
+
+def normalize_url(url):
+    '''
+    Normalize a link so that trivially different spellings of the same
+    target (scheme, www., trailing slash, fragment, tracking params) match
+    '''
+    parts = urllib.parse.urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[len("www."):]
+    query = sorted(
+        (k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if not k.startswith("utm_") and k not in TRACKING_QUERY_PARAMS
+    )
+    path = parts.path.rstrip("/")
+    return f'{host}{path}?{urllib.parse.urlencode(query)}' if query else f'{host}{path}'
+
+
+class SubmissionIndex:
+    '''
+    Set of (normalized link, subreddit) pairs already submitted by the account.
+    Used to skip submissions Reddit or moderators would reject as reposts
+    '''
+    def __init__(self):
+        self._submitted = set()
+
+    @staticmethod
+    def _key(url, subreddit_name):
+        return (normalize_url(url), subreddit_name.lower())
+
+    @classmethod
+    def build(cls, tasks, archived_tasks, submission_history):
+        '''
+        Only direct posts submitted the link itself, crossposts submitted the source permalink.
+        Submissions made before the operation was recorded count as direct posts
+        when the task had no crosspost source, the rest is left to the submission history
+        :param tasks: task documents from the tasks db
+        :param archived_tasks: summaries from the task_archive db
+        :param submission_history: (url, subreddit name) of the account's submissions
+        '''
+        index = cls()
+        for task_dict in tasks:
+            link = task_dict.get('link')
+            if link:
+                unrecorded = "" if task_dict.get('crosspost_source_link') else DIRECT_POST
+                for subreddit in task_dict.get('subreddits', []):
+                    if subreddit.get('link') and (subreddit.get('operation') or unrecorded) == DIRECT_POST:
+                        index.add(link, subreddit.get('name', ""))
+        for summary in archived_tasks:
+            link = summary.get('link')
+            if link:
+                for post in summary.get('posts', []):
+                    if post.get('operation') == DIRECT_POST:
+                        index.add(link, post['subreddit'])
+        for url, subreddit_name in submission_history:
+            index.add(url, subreddit_name)
+        return index
+
+    def add(self, url, subreddit_name):
+        self._submitted.add(SubmissionIndex._key(url, subreddit_name))
+
+    def contains(self, url, subreddit_name):
+        return SubmissionIndex._key(url, subreddit_name) in self._submitted
+
+    @classmethod
+    def from_list(cls, submitted):
+        index = cls()
+        index._submitted = set(map(tuple, submitted))
+        return index
+
+    @classmethod
+    def to_list(cls, obj):
+        return [list(key) for key in obj._submitted]
+
+    def __len__(self):
+        return len(self._submitted)
@@ -1,18 +1,22 @@
+from collections import Counter, deque
 from datetime import datetime, timedelta
 import logging
-import time
+import random
 import praw
-from .jobs import schedule_reply
-from .task import Task
-from .utils import sleep_with_progess
+from .capability import (
+    SubredditCapability, CROSSPOST_FORBIDDEN, NSFW_CROSSPOST_FORBIDDEN,
+    FLAIR_REQUIRED, LINK_FORBIDDEN, BANNED, SILENTLY_REMOVES
+)
+from .duplicates import SubmissionIndex
+from .scheduling import schedule, ROUND_ROBIN
+from .task import Task, CROSSPOST, DIRECT_POST
+from .turnover import TurnoverEstimator
+from .utils import Clock
 
+logger = logging.getLogger(__name__)
 
-class Executor:
 
-    @staticmethod
-    def _is_crosspost_forbidden_error(error):
-        reddit_api_crosspost_forbidden_errors = ["NO_CROSSPOSTS", "OVER18_SUBREDDIT_CROSSPOST"]
-        return error.error_type in reddit_api_crosspost_forbidden_errors
+class Executor:
 
     @staticmethod
     def _within_last_hours(last_posted_timestamp, hours, timestamp):
@@ -26,6 +30,17 @@ class Executor:
         max_reposting_delay=24,
         subreddit_frontpage_shreshold=10,
         run_interval_seconds=3600,
+        capability_ttl_hours=168,
+        reply_queue=None,
+        archiver=None,
+        submission_history_limit=1000,
+        turnover_min_samples=3,
+        turnover_verify_rate=0.1,
+        clock=None,
+        scheduling_policy=ROUND_ROBIN,
+        post_health=None,
+        removal_backoff_hours=72,
+        snapshot=None,
     ):
         self._reddit = reddit
         self._db = db
@@ -35,6 +50,30 @@ class Executor:
         self._max_reposting_delay = max_reposting_delay
         self._subreddit_frontpage_shreshold = subreddit_frontpage_shreshold
         self._run_interval_seconds = run_interval_seconds
+        self._capability_ttl_hours = capability_ttl_hours
+        # subreddit name -> SubredditCapability, lazily loaded from db
+        self._capabilities = {}
+        self._reply_queue = reply_queue
+        self._archiver = archiver
+        self._submission_history_limit = submission_history_limit
+        # (link, subreddit) pairs already submitted, built on first use
+        self._submission_index = None
+        # frontpage checks are skipped when the turnover of a subreddit is predictable
+        # a fraction of the confident predictions is still checked to measure their accuracy
+        self._turnover_min_samples = turnover_min_samples
+        self._turnover_verify_rate = turnover_verify_rate
+        self._turnover_metrics = Counter()
+        self._clock = clock or Clock()
+        self._scheduling_policy = scheduling_policy
+        # seconds from task creation to its first post, for the most recent tasks
+        self._first_post_latencies = deque(maxlen=1000)
+        self._post_health = post_health
+        self._removal_backoff_hours = removal_backoff_hours
+        # subreddit name -> subreddit record (None if never posted), lazily loaded from db
+        self._subreddit_records = {}
+        # crosspost source link -> title
+        self._titles = {}
+        self._snapshot = snapshot
 
     def _get_operations(self, task):
         '''
@@ -52,6 +91,72 @@ class Executor:
 
         return operations
 
+    def _get_capability(self, subreddit_name):
+        capability = self._capabilities.get(subreddit_name)
+        if capability is None:
+            record = self._db.subreddit_capability.get(subreddit_name)
+            capability = SubredditCapability.from_dict(record) if record else SubredditCapability(subreddit_name)
+            self._capabilities[subreddit_name] = capability
+        return capability
+
+    def _learn_capability(self, subreddit_name, fact, ttl_hours=None):
+        ttl_hours = ttl_hours or self._capability_ttl_hours
+        capability = self._get_capability(subreddit_name)
+        capability.learn(fact, self._clock.time(), ttl_hours)
+        self._db.subreddit_capability.upsert(subreddit_name, SubredditCapability.to_dict(capability))
+        logger.info(f'Learned [{fact}] for subreddit [{subreddit_name}] for {ttl_hours} hours')
+
+    def _apply_capability(self, task, subreddit, operations, capability):
+        '''
+        Narrow down the operations of a task to the ones the subreddit
+        is known to accept, based on earlier learned facts
+        :returns: (allowed operations, reason if the subreddit should be skipped)
+        '''
+        now = self._clock.time()
+        if capability.has(BANNED, now):
+            return [], f'Not allowed to post on subreddit [{subreddit.name}]'
+        if capability.has(FLAIR_REQUIRED, now) and not subreddit.flair_id:
+            return [], f'Subreddit [{subreddit.name}] requires a post flair but no flair_id is configured'
+
+        forbidden = []
+        if capability.has(CROSSPOST_FORBIDDEN, now) or (task.nsfw and capability.has(NSFW_CROSSPOST_FORBIDDEN, now)):
+            forbidden.append(self._crosspost)
+        if capability.has(LINK_FORBIDDEN, now):
+            forbidden.append(self._post_direct)
+
+        allowed = [op_func for op_func in operations if op_func not in forbidden]
+        if not allowed:
+            return [], f'None of the operations of task [{task.id}] are allowed on subreddit [{subreddit.name}]'
+        return allowed, None
+
+    def _get_submission_index(self):
+        if self._submission_index is None:
+            self._submission_index = SubmissionIndex.build(
+                self._db.task.get_all(),
+                self._db.task_archive.get_all(),
+                self._reddit.get_submission_history(limit=self._submission_history_limit)
+            )
+            logger.info(f'Indexed {len(self._submission_index)} earlier submissions')
+        return self._submission_index
+
+    def _apply_submission_index(self, task, subreddit, operations):
+        '''
+        Drop the direct post of a link already submitted to the subreddit
+        :returns: (allowed operations, reason if the subreddit should be skipped)
+        '''
+        if not task.link or not self._get_submission_index().contains(task.link, subreddit.name):
+            return operations, None
+
+        allowed = [op_func for op_func in operations if op_func != self._post_direct]
+        if not allowed:
+            return [], f'Link [{task.link}] was already submitted to subreddit [{subreddit.name}]'
+        return allowed, None
+
+    def _get_subreddit_record(self, subreddit_name):
+        if subreddit_name not in self._subreddit_records:
+            self._subreddit_records[subreddit_name] = self._db.subreddit_record.get(subreddit_name)
+        return self._subreddit_records[subreddit_name]
+
     def _is_in_running_window(self, timestamp):
         hour = timestamp.hour
         start, end = self._running_window
@@ -66,7 +171,9 @@ class Executor:
             if "reddit.com" not in crosspost_source_link:
                 raise ValueError(f'Invalid crosspost target: {crosspost_source_link} not a proper reddit submission')
 
-            return self._reddit.get_post_title(crosspost_source_link)
+            if crosspost_source_link not in self._titles:
+                self._titles[crosspost_source_link] = self._reddit.get_post_title(crosspost_source_link)
+            return self._titles[crosspost_source_link]
         return task.title
 
     def _crosspost(self, task, subreddit):
@@ -78,7 +185,7 @@ class Executor:
             raise ValueError('No crosspost source link found for this task')
 
         post_url = self._reddit.crosspost(subreddit.name, crosspost_source_link, flair_id=subreddit.flair_id, nsfw=task.nsfw)
-        logging.info(f'{post_url} crossposted successfully')
+        logger.info(f'{post_url} crossposted successfully')
 
         return post_url
 
@@ -102,12 +209,15 @@ class Executor:
             )
 
         submission, post_url = self._reddit.post(subreddit.name, title, link, flair_id=subreddit.flair_id, nsfw=task.nsfw)
-        logging.info(f'{post_url} posted successfully')
+        logger.info(f'{post_url} posted successfully')
 
-        # Schedule async jobs to reply the post
+        # Queue the reply to be made asynchronously by the reply workers
         if task.reply_content:
-            schedule_reply(submission, task.reply_content, self._reddit)
-            logging.info('Reply scheduled')
+            if self._reply_queue is None:
+                logger.warning('No reply queue configured. Reply skipped')
+            else:
+                self._reply_queue.put(submission.id, task.reply_content)
+                logger.info('Reply scheduled')
 
         return post_url
 
@@ -119,54 +229,97 @@ class Executor:
         for op_func in operations:
             try:
                 post_url = op_func(task, subreddit)
-                self._update_documents_on_success(task, subreddit, post_url)
+                operation = CROSSPOST if op_func == self._crosspost else DIRECT_POST
+                self._update_documents_on_success(task, subreddit, post_url, operation)
                 return True
             except praw.exceptions.RedditAPIException as api_exception:
-                if Executor._is_crosspost_forbidden_error(api_exception):
-                    logging.warning(f'Crosspost not allowed on subreddit [{subreddit.name}], will make a direct post')
-                    continue
-                else:
+                fact = SubredditCapability.fact_from_error(api_exception.error_type)
+                if not fact:
                     raise
+                self._learn_capability(subreddit.name, fact)
+                if (fact in [CROSSPOST_FORBIDDEN, NSFW_CROSSPOST_FORBIDDEN] and op_func == self._crosspost) or \
+                        (fact == LINK_FORBIDDEN and op_func == self._post_direct):
+                    logger.warning(f'Operation [{op_func.__name__}] not allowed on subreddit [{subreddit.name}], try next one')
+                    continue
+                logger.error(f'Failed to process task [{task.id}] on subreddit [{subreddit.name}]: {api_exception}')
+                self._update_documents_on_error(task, subreddit, api_exception)
+                return False
             except Exception as e:
-                logging.error(f'Failed to process task [{task.id}] on subreddit [{subreddit.name}]: {e}')
+                logger.error(f'Failed to process task [{task.id}] on subreddit [{subreddit.name}]: {e}')
                 self._update_documents_on_error(task, subreddit, e)
         return False
 
-    def _process_task(self, task):
-        logging.info(f'Start processing task [{task.id}]')
-        subreddits = task.subreddits
-        # Get the mode of opeartions from the task document
-        # This allows flexible mode defined per task
-        operations = self._get_operations(task)
-        for subreddit in subreddits:
-            subreddit_name = subreddit.name
-            logging.info(f'Starting: Task [{task.id}] subreddit [{subreddit_name}]')
-
-            if subreddit.processed:
-                logging.info('Already processed. Skip')
-            else:
-                record = self._db.subreddit_record.get(subreddit_name)
-                if self._should_post(record, datetime.now()):
-                    posted = self._process_subreddit_in_task(task, subreddit, operations)
-                    if posted:
-                        # sleep for a short period after each successful post
-                        sleep_with_progess(60)
+    def _process_subreddit(self, task, subreddit, operations):
+        subreddit_name = subreddit.name
+        logger.info('Starting: Task [%s] subreddit [%s]', task.id, subreddit_name)
+
+        # Rule out operations the subreddit is known to reject before any network call
+        capability = self._get_capability(subreddit_name)
+        if capability.has(SILENTLY_REMOVES, self._clock.time()):
+            logger.info(
+                '[Admission Control] DENIED: Recent posts on [%s] were removed. Back off',
+                subreddit_name
+            )
+            return
+
+        subreddit_operations, skip_reason = self._apply_capability(task, subreddit, operations, capability)
+        if not skip_reason:
+            subreddit_operations, skip_reason = self._apply_submission_index(task, subreddit, subreddit_operations)
+        if skip_reason:
+            logger.warning(f'{skip_reason}. Skip')
+            self._update_documents_on_skip(task, subreddit, skip_reason)
+            return
+
+        record = self._get_subreddit_record(subreddit_name)
+        if self._should_post(record, self._clock.now()):
+            posted = self._process_subreddit_in_task(task, subreddit, subreddit_operations)
+            if posted:
+                # sleep for a short period after each successful post
+                self._clock.sleep(60)
 
     def _process_tasks(self):
         uncompleted_tasks = self._db.task.get_uncompleted()
-        logging.info(f'Found total {len(uncompleted_tasks)} uncompleted tasks')
+        logger.info(f'Found total {len(uncompleted_tasks)} uncompleted tasks')
+        now = self._clock.time()
+        tasks, operations = [], {}
         for task_dict in uncompleted_tasks:
             # documents fetched from db are in dict shape
             # use marshalled Task object as argument
             task = Task.from_dict(task_dict)
-            self._process_task(task)
+            if not task.created_timestamp:
+                # saved right away, a task denied by admission control may not be updated for many cycles
+                task.created_timestamp = now
+                self._db.task.update(Task.to_dict(task))
+            # Get the mode of opeartions from the task document
+            # This allows flexible mode defined per task
+            operations[task.id] = self._get_operations(task)
+            tasks.append(task)
+
+        # Interleave subreddits of all tasks so that one wide task does not starve the others
+        for task, subreddit in schedule(tasks, self._scheduling_policy, now, self._run_interval_seconds):
+            self._process_subreddit(task, subreddit, operations[task.id])
+
+        metrics = self._turnover_metrics
+        logger.info(
+            '[Frontpage Checks] This cycle %d made, %d avoided. Predictions verified: %d, wrong: %d',
+            metrics["probes"], metrics["probes_avoided"], metrics["verified"], metrics["wrong"]
+        )
+        metrics.clear()
+
+        latencies = sorted(self._first_post_latencies)
+        if latencies:
+            logger.info(
+                f'[Scheduling] Hours from task creation to first post over the last {len(latencies)} tasks: ' +
+                f'median {latencies[len(latencies) // 2] / 3600:.1f}, ' +
+                f'p95 {latencies[int(len(latencies) * 0.95)] / 3600:.1f}, ' +
+                f'max {latencies[-1] / 3600:.1f}'
+            )
 
     def _should_post(self, record, timestamp):
         # first time posting on that subreddit, should allow
         if not record:
-            logging.info(
-                '[Admission Control] ALLOWED: ' +
-                'First time posting'
+            logger.info(
+                '[Admission Control] ALLOWED: First time posting'
             )
             return True
 
@@ -178,10 +331,10 @@ class Executor:
         min_delay = self._min_reposting_delay
 
         if Executor._within_last_hours(last_posted_time, min_delay, timestamp):
-            logging.info(
+            logger.info(
                 '[Admission Control] DENIED: ' +
-                f'Most recent post on [{subreddit_name}] at [{last_posted_time}] ' +
-                f'does not satisfy min reposting delay {min_delay} hours'
+                'Most recent post on [%s] at [%s] does not satisfy min reposting delay %s hours',
+                subreddit_name, last_posted_time, min_delay
             )
             return False
 
@@ -189,69 +342,166 @@ class Executor:
         # allow to post
         max_delay = self._max_reposting_delay
         if not Executor._within_last_hours(last_posted_time, max_delay, timestamp):
-            logging.info(
+            logger.info(
                 '[Admission Control] ALLOWED: ' +
-                f'Most recent post on [{subreddit_name}] at [{last_posted_time}] ' +
-                f'exceeds max reposting delay {max_delay} hours. '
+                'Most recent post on [%s] at [%s] exceeds max reposting delay %s hours. ',
+                subreddit_name, last_posted_time, max_delay
             )
             return True
 
+        # Predict from the turnover observed on that subreddit whether
+        # an earlier submission is still on the frontpage
+        age_hours = (timestamp - last_posted_time).total_seconds() / 3600
+        estimator = TurnoverEstimator.from_dict(record.get('turnover', {}))
+        predicted = estimator.predict(age_hours, min_samples=self._turnover_min_samples)
+        if predicted is not None and random.random() >= self._turnover_verify_rate:
+            self._turnover_metrics['probes_avoided'] += 1
+            logger.info(
+                '[Admission Control] %s: ' +
+                'Most recent post on [%s] at [%s] satisfy min reposting delay %s hours. ' +
+                'Predicted %s on the frontpage from past turnover',
+                "DENIED" if predicted else "ALLOWED", subreddit_name, last_posted_time, min_delay,
+                "still" if predicted else "no longer"
+            )
+            return not predicted
+
         # If any earlier submission is on the frontpage of that subreddit
         # delay new submission for this round
         is_new = self._reddit.is_on_frontpage(subreddit_name, "new", threshold=self._subreddit_frontpage_shreshold)
         is_hot = self._reddit.is_on_frontpage(subreddit_name, "hot", threshold=self._subreddit_frontpage_shreshold)
+
+        on_frontpage = is_new or is_hot
+        self._turnover_metrics['probes'] += 1
+        if predicted is not None:
+            self._turnover_metrics['verified'] += 1
+            if predicted != on_frontpage:
+                self._turnover_metrics['wrong'] += 1
+        estimator.observe(age_hours, on_frontpage)
+        record['turnover'] = TurnoverEstimator.to_dict(estimator)
+        self._db.subreddit_record.update_fields(subreddit_name, {
+            "turnover": record['turnover']
+        })
+
         if is_new:
             msg = "new listings"
         if is_hot:
             msg = "hot listings"
 
-        if is_new or is_hot:
-            logging.info(
+        if on_frontpage:
+            logger.info(
                 '[Admission Control] DENIED: ' +
-                f'Most recent post on [{subreddit_name}] at [{last_posted_time}] ' +
-                f'satisfy min reposting delay {min_delay} hours. ' +
-                f'However, found earlier submission within top [{self._subreddit_frontpage_shreshold}] of ' +
-                f'[{msg}]'
+                'Most recent post on [%s] at [%s] satisfy min reposting delay %s hours. ' +
+                'However, found earlier submission within top [%s] of [%s]',
+                subreddit_name, last_posted_time, min_delay, self._subreddit_frontpage_shreshold, msg
             )
             return False
 
-        logging.info(
+        logger.info(
             '[Admission Control] ALLOWED: ' +
-            f'Most recent post on [{subreddit_name}] at [{last_posted_time}] ' +
-            f'satisfies min reposing period of {min_delay} hours. ' +
-            'No earlier submission found in hot nor new listings.'
+            'Most recent post on [%s] at [%s] satisfies min reposing period of %s hours. ' +
+            'No earlier submission found in hot nor new listings.',
+            subreddit_name, last_posted_time, min_delay
         )
 
         return True
 
-    def _update_documents_on_success(self, task, subreddit, submission_url):
-        timestamp = time.time()
-        task.update_on_success(subreddit, timestamp, submission_url)
+    def _update_documents_on_success(self, task, subreddit, submission_url, operation):
+        timestamp = self._clock.time()
+        if task.created_timestamp and not any(item.link for item in task.subreddits):
+            self._first_post_latencies.append(timestamp - task.created_timestamp)
+        task.update_on_success(subreddit, timestamp, submission_url, operation)
 
         # Update task in db
         self._db.task.update(Task.to_dict(task))
 
-        # Update subreddit_last_posted record
-        self._db.subreddit_record.upsert(subreddit.name, {
-            "_id": subreddit.name,
+        # a crosspost submits the source permalink, the link itself can still be posted there later
+        if operation == DIRECT_POST and task.link and self._submission_index is not None:
+            self._submission_index.add(task.link, subreddit.name)
+
+        # Update subreddit_last_posted record, keeping what was learned about the subreddit
+        record = self._subreddit_records.get(subreddit.name) or {"_id": subreddit.name}
+        record["lastPostedTimestamp"] = timestamp
+        self._subreddit_records[subreddit.name] = record
+        self._db.subreddit_record.update_fields(subreddit.name, {
             "lastPostedTimestamp": timestamp
         })
 
+    def _update_documents_on_skip(self, task, subreddit, reason):
+        timestamp = self._clock.time()
+        task.update_on_skip(subreddit, timestamp, reason)
+
+        # Update task in db
+        self._db.task.update(Task.to_dict(task))
+
     def _update_documents_on_error(self, task, subreddit, error):
-        timestamp = time.time()
+        timestamp = self._clock.time()
         task.update_on_error(subreddit, timestamp, error)
 
         # Update task in db
         self._db.task.update(Task.to_dict(task))
 
+    def run_cycle(self):
+        if self._is_in_running_window(self._clock.now()):
+            logger.info("In running window. Starting processing tasks")
+            self._process_tasks()
+        else:
+            logger.info("Out of running window.")
+
+        if self._post_health:
+            try:
+                for subreddit_name in self._post_health.sweep(self._clock.time()):
+                    self._learn_capability(subreddit_name, SILENTLY_REMOVES, ttl_hours=self._removal_backoff_hours)
+            except Exception as e:
+                logger.error(f'Failed to check health of recent posts: {e}')
+
+        if self._archiver:
+            try:
+                self._archiver.run()
+            except Exception as e:
+                logger.error(f'Failed to archive completed tasks: {e}')
+
+        if self._snapshot:
+            try:
+                self._snapshot.save(self.export_state(), self._clock.time())
+            except Exception as e:
+                logger.error(f'Failed to save snapshot: {e}')
+
+    def export_state(self):
+        '''
+        State derived from the db and the Reddit API, for a warm start after a restart.
+        Deferred replies are not part of it, they are kept in the durable reply queue
+        '''
+        return {
+            "username": self._reddit.username,
+            "ratelimited_until": self._reddit.ratelimiter.blocked_until,
+            "subreddit_records": self._subreddit_records,
+            "capabilities": {
+                name: SubredditCapability.to_dict(capability) for name, capability in self._capabilities.items()
+            },
+            "titles": self._titles,
+            "submission_index": (
+                SubmissionIndex.to_list(self._submission_index) if self._submission_index is not None else None
+            ),
+        }
+
+    def restore_state(self, state):
+        self._reddit.ratelimiter.block_until(state.get('ratelimited_until', 0))
+        self._subreddit_records = state.get('subreddit_records', {})
+        self._capabilities = {
+            name: SubredditCapability.from_dict(record) for name, record in state.get('capabilities', {}).items()
+        }
+        self._titles = state.get('titles', {})
+        if state.get('submission_index') is not None:
+            self._submission_index = SubmissionIndex.from_list(state['submission_index'])
+        logger.info(
+            f'Restored state of {len(self._subreddit_records)} subreddits, ' +
+            f'{len(self._capabilities)} learned capabilities and {len(self._titles)} titles'
+        )
+
     def run(self):
         while True:
-            if self._is_in_running_window(datetime.now()):
-                logging.info("In running window. Starting processing tasks")
-                self._process_tasks()
-            else:
-                logging.info("Out of running window.")
+            self.run_cycle()
 
             # Run the cycle at time intervals
-            logging.info(f'This run cycle is over. Sleep {self._run_interval_seconds // 60} minutes')
-            sleep_with_progess(self._run_interval_seconds)
+            logger.info(f'This run cycle is over. Sleep {self._run_interval_seconds // 60} minutes')
+            self._clock.sleep(self._run_interval_seconds)
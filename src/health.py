@@ -0,0 +1,89 @@
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+SUBMISSION_ID_PATTERN = re.compile(r'/comments/([a-z0-9]+)')
+
+
+def fullname_from_url(post_url):
+    '''
+    Reddit fullname (t3_<id>) of the submission behind a permalink, None if not a submission url
+    '''
+    match = SUBMISSION_ID_PATTERN.search(post_url or "")
+    return f't3_{match.group(1)}' if match else None
+
+
+class PostHealthSweeper:
+    '''
+    Periodically looks up the recent submissions made for tasks in batches
+    and keeps per subreddit snapshots of whether each one was removed and its score.
+    Subreddits removing a large share of them are reported so that posting there can back off
+    '''
+    # snapshots kept per subreddit, most recent posts first
+    MAX_POSTS = 50
+
+    def __init__(self, reddit, db, lookback_hours=72, min_posts=3, removal_ratio=0.5):
+        self._reddit = reddit
+        self._db = db
+        self._lookback_hours = lookback_hours
+        self._min_posts = min_posts
+        self._removal_ratio = removal_ratio
+
+    def _recent_posts(self, timestamp):
+        '''
+        :returns: {fullname: subreddit name} of submissions made within the lookback period
+        '''
+        cutoff = timestamp - self._lookback_hours * 3600
+        posts = {}
+        for task_dict in self._db.task.get_updated_since(cutoff):
+            for subreddit in task_dict.get('subreddits', []):
+                posted_at = subreddit.get('timestamp')
+                fullname = fullname_from_url(subreddit.get('link'))
+                if fullname and isinstance(posted_at, (int, float)) and posted_at >= cutoff:
+                    posts[fullname] = subreddit['name']
+        return posts
+
+    def _store(self, subreddit_name, health, timestamp):
+        '''
+        Merge new snapshots into the subreddit's health record
+        :returns: the merged {fullname: [removed, score, checked timestamp]}
+        '''
+        record = self._db.post_health.get(subreddit_name) or {}
+        snapshots = dict(record.get('posts', {}))
+        for fullname, (removed, score) in health.items():
+            snapshots[fullname] = [int(removed), score, round(timestamp)]
+        latest = sorted(snapshots.items(), key=lambda item: item[1][2], reverse=True)[:PostHealthSweeper.MAX_POSTS]
+        snapshots = dict(latest)
+        self._db.post_health.upsert(subreddit_name, {"_id": subreddit_name, "posts": snapshots})
+        return snapshots
+
+    def sweep(self, timestamp):
+        '''
+        Check the health of recent submissions
+        :returns: names of subreddits silently removing too many of our submissions
+        '''
+        posts = self._recent_posts(timestamp)
+        if not posts:
+            return []
+
+        health = self._reddit.get_post_health(list(posts))
+        by_subreddit = {}
+        for fullname, status in health.items():
+            by_subreddit.setdefault(posts[fullname], {})[fullname] = status
+
+        removing = []
+        cutoff = timestamp - self._lookback_hours * 3600
+        for subreddit_name, subreddit_health in by_subreddit.items():
+            snapshots = self._store(subreddit_name, subreddit_health, timestamp)
+            # only submissions still within the lookback period count, so a back off ends on its own
+            recent = [snapshot for snapshot in snapshots.values() if snapshot[2] >= cutoff]
+            removed = sum(snapshot[0] for snapshot in recent)
+            if len(recent) >= self._min_posts and removed / len(recent) >= self._removal_ratio:
+                removing.append(subreddit_name)
+
+        logger.info(
+            '[Post Health] Checked %d submissions in %d subreddits. %d removed',
+            len(health), len(by_subreddit), sum(1 for removed, _ in health.values() if removed)
+        )
+        return removing
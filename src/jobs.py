@@ -1,13 +1,165 @@
-from huey import SqliteHuey
+import logging
+import sqlite3
+import threading
+import time
+from collections import namedtuple
 
-huey = SqliteHuey('testing')
+logger = logging.getLogger(__name__)
 
+PendingReply = namedtuple('PendingReply', ['id', 'submission_id', 'reply_content', 'attempts'])
 
-@huey.task(retries=10, retry_delay=300)
-def schedule_reply(submission, reply_content, reddit):
+
+class ReplyQueue:
+    '''
+    Persistent queue of replies to be made to newly created submissions.
+    Backed by a local sqlite file so pending replies survive restarts and
+    can be shared between the posting process and a replies-only process.
+    Only the submission id and reply content are stored for each reply
+    '''
+    def __init__(self, path, lease_seconds=3600):
+        self._lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS replies ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'submission_id TEXT NOT NULL, '
+            'reply_content TEXT NOT NULL, '
+            'attempts INTEGER NOT NULL DEFAULT 0, '
+            'not_before REAL NOT NULL DEFAULT 0, '
+            'claimed_until REAL NOT NULL DEFAULT 0)'
+        )
+
+    def put(self, submission_id, reply_content, delay=0):
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO replies (submission_id, reply_content, not_before) VALUES (?, ?, ?)',
+                (submission_id, reply_content, time.time() + delay)
+            )
+
+    def take(self, batch_size):
+        '''
+        Claim up to batch_size replies that are due.
+        Claimed replies are leased so that they are handed out again
+        if the worker holding them dies before calling done / retry
+        '''
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self._conn.execute(
+                    'SELECT id, submission_id, reply_content, attempts FROM replies '
+                    'WHERE not_before <= ? AND claimed_until <= ? ORDER BY not_before LIMIT ?',
+                    (now, now, batch_size)
+                ).fetchall()
+                self._conn.executemany(
+                    'UPDATE replies SET claimed_until = ? WHERE id = ?',
+                    [(now + self._lease_seconds, row[0]) for row in rows]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return [PendingReply(*row) for row in rows]
+
+    def done(self, reply_id):
+        with self._lock:
+            self._conn.execute('DELETE FROM replies WHERE id = ?', (reply_id,))
+
+    def retry(self, reply_id, attempts, delay):
+        with self._lock:
+            self._conn.execute(
+                'UPDATE replies SET attempts = ?, not_before = ?, claimed_until = 0 WHERE id = ?',
+                (attempts, time.time() + delay, reply_id)
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM replies').fetchone()[0]
+
+
+class ReplyWorkerPool:
     '''
-    schedule_reply will add task to reply a given submission via comment
-    the scheduled task will run outside of main processing window to avoid
-    excessive reddit API ratelimiting. Tasks run with retries & delays in between
+    Threads that drain the reply queue in batches within the current process.
+    Each worker calls make_reddit once for a RedditService of its own, since
+    praw.Reddit is not thread safe. Forking the executor's RedditService lets
+    the workers share its ratelimiter. Failed replies are retried with
+    exponential backoff and dropped after max_retries attempts
     '''
-    reddit.reply(submission, reply_content)
+    def __init__(
+        self, make_reddit, queue,
+        workers=1,
+        batch_size=10,
+        max_retries=10,
+        retry_delay=300,
+        max_retry_delay=6 * 3600,
+        poll_interval=30,
+    ):
+        self._make_reddit = make_reddit
+        self._queue = queue
+        self._workers = workers
+        self._batch_size = batch_size
+        self._max_retries = max_retries
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+        self._poll_interval = poll_interval
+        self._stopped = threading.Event()
+        self._threads = []
+
+    def _backoff(self, attempts):
+        return min(self._retry_delay * 2 ** (attempts - 1), self._max_retry_delay)
+
+    def _handle(self, reddit, reply):
+        try:
+            reddit.reply(reply.submission_id, reply.reply_content)
+            self._queue.done(reply.id)
+        except Exception as e:
+            attempts = reply.attempts + 1
+            if attempts > self._max_retries:
+                logger.error(f'Giving up replying to submission [{reply.submission_id}] after {reply.attempts} retries: {e}')
+                self._queue.done(reply.id)
+                return
+            delay = self._backoff(attempts)
+            logger.warning(f'Failed to reply to submission [{reply.submission_id}]: {e}. Retry in {delay} seconds')
+            self._queue.retry(reply.id, attempts, delay)
+
+    def _work(self):
+        reddit = None
+        while not self._stopped.is_set():
+            try:
+                if reddit is None:
+                    reddit = self._make_reddit()
+                batch = self._queue.take(self._batch_size)
+                if not batch:
+                    self._stopped.wait(self._poll_interval)
+                    continue
+                for reply in batch:
+                    self._handle(reddit, reply)
+            except Exception as e:
+                # keep the worker alive, replies leased by a failed batch are handed out again later
+                logger.exception(f'Reply worker failed: {e}. Retry in {self._poll_interval} seconds')
+                self._stopped.wait(self._poll_interval)
+
+    def start(self):
+        for i in range(self._workers):
+            thread = threading.Thread(target=self._work, name=f'reply-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f'Started {self._workers} reply workers')
+
+    def stop(self):
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def run(self):
+        '''
+        Process replies in the foreground until interrupted
+        '''
+        self.start()
+        try:
+            while not self._stopped.wait(self._poll_interval):
+                pass
+        except KeyboardInterrupt:
+            self.stop()
@@ -0,0 +1,100 @@
+from collections import Counter
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import coloredlogs
+from . import utils
+
+ADMISSION_CONTROL_PREFIX = '[Admission Control]'
+
+
+class JsonFormatter(logging.Formatter):
+    '''
+    One JSON object per line. The unformatted message template is kept
+    as "event" so that repetitive messages are easy to group
+    '''
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "event": str(record.msg),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    '''
+    Queue handler leaving message formatting to the background writer thread
+    '''
+    def prepare(self, record):
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    '''
+    Let through only every n-th record of each admission control message template.
+    Warnings and errors always pass
+    '''
+    def __init__(self, every):
+        super().__init__()
+        self._every = every
+        self._seen = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not str(record.msg).startswith(ADMISSION_CONTROL_PREFIX):
+            return True
+        with self._lock:
+            count = self._seen[record.msg]
+            self._seen[record.msg] += 1
+        return count % self._every == 0
+
+
+def _level_number(level):
+    return level if isinstance(level, int) else logging.getLevelName(level.upper())
+
+
+def configure_logging(config):
+    '''
+    Set up logging from the logging section of configs.yaml
+    console: colored, human-readable lines written synchronously (default)
+    json: JSON lines handed over through a queue to a background writer thread
+    '''
+    level = config.get('level', 'INFO')
+    root = logging.getLogger()
+
+    if config.get('format', 'console') == 'json':
+        root.setLevel(level)
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(JsonFormatter())
+        listener = logging.handlers.QueueListener(queue.Queue(), stream_handler)
+        root.addHandler(DeferredQueueHandler(listener.queue))
+        listener.start()
+        atexit.register(listener.stop)
+        # a progressbar would garble the JSON lines
+        utils.SHOW_PROGRESS = False
+    else:
+        # the handler lets through the lowest configured level so that components can also log below the global one
+        component_levels = config.get('levels', {}).values()
+        coloredlogs.install(
+            level=min(_level_number(level) for level in [level, *component_levels]),
+            fmt='%(asctime)s, %(levelname)s %(message)s',
+            logger=root
+        )
+        root.setLevel(level)
+
+    # per component levels, e.g. {"src.reddit": "WARNING"}
+    for name, component_level in config.get('levels', {}).items():
+        logging.getLogger(name).setLevel(component_level)
+
+    sample_every = config.get('sample_admission_every', 1)
+    if sample_every > 1:
+        logging.getLogger('src.executor').addFilter(SamplingFilter(sample_every))
@@ -1,39 +1,91 @@
 import functools
 import logging
 import re
+import threading
+import time
 import praw
 from .utils import sleep_with_progess
 
+logger = logging.getLogger(__name__)
+
 
 def _handle_ratelimit(function):
     """
     A decorator that handles reddit API ratelimiting
+    Every caller sharing the same RedditService waits on its ratelimiter
     """
     @functools.wraps(function)
-    def wrapper(*args, **kwargs):
+    def wrapper(self, *args, **kwargs):
+        self.ratelimiter.wait()
         try:
-            return function(*args, **kwargs)
+            return function(self, *args, **kwargs)
         except praw.exceptions.RedditAPIException as e:
             # Ratelimit api error
             if e.error_type.strip() == "RATELIMIT":
                 match = re.search(r'[0-9]+', e.message, flags=0)
                 if match:
                     mins = int(match.group())
-                    logging.warning(f'Reddit API ratelimit reached: wait {mins} minutes')
+                    logger.warning(f'Reddit API ratelimit reached: wait {mins} minutes')
                     sleep_secs = 60 * (mins + 1) + 10
-                    sleep_with_progess(sleep_secs)
+                    self.ratelimiter.block(sleep_secs)
+                    self.ratelimiter.wait()
 
-                    return function(*args, **kwargs)
+                    return function(self, *args, **kwargs)
             else:
                 raise
     return wrapper
 
 
+class RateLimiter:
+    '''
+    Pause shared by all threads making Reddit API calls on the same account.
+    Once Reddit reports a ratelimit, every caller holds off until it is over
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blocked_until = 0
+
+    @property
+    def blocked_until(self):
+        return self._blocked_until
+
+    def block(self, seconds):
+        self.block_until(time.time() + seconds)
+
+    def block_until(self, timestamp):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, timestamp)
+
+    def wait(self):
+        remaining = self._blocked_until - time.time()
+        if remaining <= 0:
+            return
+        # only the main thread owns the terminal, workers must not draw a second progressbar
+        if threading.current_thread() is threading.main_thread():
+            sleep_with_progess(remaining)
+        else:
+            time.sleep(remaining)
+
+
 class RedditService:
-    def __init__(self, reddit):
+    def __init__(self, reddit, username=None, ratelimiter=None):
         self._reddit = reddit
         self._reddit.validate_on_submit = True
-        self._username = self._reddit.user.me().name
+        # the identity can be supplied from a warm-start snapshot to save a request
+        self._username = username or self._reddit.user.me().name
+        self.ratelimiter = ratelimiter or RateLimiter()
+
+    def fork(self, reddit):
+        '''
+        RedditService for another thread on the same account.
+        praw.Reddit is not thread safe, so each thread needs its own session,
+        only the ratelimiter is shared
+        '''
+        return RedditService(reddit, username=self._username, ratelimiter=self.ratelimiter)
+
+    @property
+    def username(self):
+        return self._username
 
     @_handle_ratelimit
     def crosspost(self, subreddit, existing_submission_link, flair_id=None, nsfw=False):
@@ -74,6 +126,27 @@ class RedditService:
 
         return False
 
+    def get_post_health(self, fullnames, batch_size=100):
+        '''
+        Look up submissions by fullname, batch_size of them per API request
+        :returns: {fullname: (removed, score)} for each submission found
+        '''
+        health = {}
+        for i in range(0, len(fullnames), batch_size):
+            for submission in self._reddit.info(fullnames=fullnames[i:i + batch_size]):
+                # removed by moderators, automoderator, spam filters or deleted
+                removed = bool(submission.removed_by_category or getattr(submission, 'banned_by', None))
+                health[submission.fullname] = (removed, submission.score)
+        return health
+
+    def get_submission_history(self, limit=1000):
+        '''
+        Most recent submissions of the current authenticated user
+        :returns: list of (url, subreddit name) for each submission
+        '''
+        submissions = self._reddit.redditor(self._username).submissions.new(limit=limit)
+        return [(submission.url, submission.subreddit.display_name) for submission in submissions]
+
     @_handle_ratelimit
     def post(self, subreddit, title, link, flair_id=None, nsfw=False):
         '''
@@ -91,6 +164,7 @@ class RedditService:
 
         return (submission, reddit_base_url + submission.permalink)
 
-    def reply(self, submission, reply_content):
-        submission.reply(reply_content)
-        logging.info("commented successfully")
+    @_handle_ratelimit
+    def reply(self, submission_id, reply_content):
+        self._reddit.submission(id=submission_id).reply(reply_content)
+        logger.info(f'Commented on submission [{submission_id}] successfully')
@@ -0,0 +1,36 @@
+FIFO = "fifo"
+ROUND_ROBIN = "round_robin"
+WEIGHTED_FAIR = "weighted_fair"
+POLICIES = [FIFO, ROUND_ROBIN, WEIGHTED_FAIR]
+
+
+def schedule(tasks, policy, now, urgent_within):
+    '''
+    Order the pending subreddits of the given tasks for processing
+    fifo: task by task, in the given order
+    round_robin: one subreddit of every task in turn
+    weighted_fair: like round_robin, but a task with priority n gets n turns for every turn of a task with priority 1
+    Except for fifo, subreddits of tasks whose deadline is within urgent_within seconds go first, earliest deadline first
+    :returns: list of (task, subreddit)
+    '''
+    if policy not in POLICIES:
+        raise ValueError(f'Unknown scheduling policy [{policy}]. Expected one of {POLICIES}')
+
+    entries = []
+    for task_order, task in enumerate(tasks):
+        weight = task.priority if policy == WEIGHTED_FAIR and task.priority > 0 else 1
+        pending = [subreddit for subreddit in task.subreddits if not subreddit.processed]
+        for i, subreddit in enumerate(pending):
+            if policy == FIFO:
+                key = (task_order, i)
+            else:
+                # virtual finish time of this subreddit in weighted fair queuing
+                finish = (i + 1) / weight
+                if task.deadline is not None and task.deadline <= now + urgent_within:
+                    key = (0, task.deadline, finish, task_order)
+                else:
+                    key = (1, finish, task_order)
+            entries.append((key, task, subreddit))
+
+    entries.sort(key=lambda entry: entry[0])
+    return [(task, subreddit) for _, task, subreddit in entries]
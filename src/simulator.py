@@ -0,0 +1,218 @@
+from collections import Counter, namedtuple
+from datetime import datetime
+import copy
+import operator
+import time
+from .db import DbService
+from .executor import Executor
+from .utils import Clock
+
+ScheduledPost = namedtuple('ScheduledPost', ['timestamp', 'task_id', 'subreddit'])
+
+# mango range operators supported by InMemoryDbEngine, applied to numeric fields only
+RANGE_OPERATORS = {
+    '$lt': operator.lt,
+    '$lte': operator.le,
+    '$gt': operator.gt,
+    '$gte': operator.ge,
+}
+
+
+class VirtualClock(Clock):
+    '''
+    Clock that jumps forward instead of sleeping
+    '''
+    def __init__(self, start):
+        self._now = start
+
+    def time(self):
+        return self._now
+
+    def sleep(self, sleep_secs):
+        self._now += sleep_secs
+
+
+class InMemoryDbEngine:
+    '''
+    Stand-in for CouchdbService holding documents in memory.
+    Supports the subset of mango selectors used by DbService
+    '''
+    def __init__(self, snapshot=None):
+        # db name -> {id: document}
+        self._dbs = {
+            name: {doc['_id']: copy.deepcopy(doc) for doc in docs}
+            for name, docs in (snapshot or {}).items()
+        }
+        self._db_name = None
+
+    @staticmethod
+    def _matches(doc, filter):
+        for field, condition in filter.items():
+            value = doc.get(field)
+            if isinstance(condition, dict):
+                for op, operand in condition.items():
+                    if op not in RANGE_OPERATORS:
+                        raise ValueError(f'Selector operator {op} is not supported in simulations')
+                    if not (isinstance(value, (int, float)) and RANGE_OPERATORS[op](value, operand)):
+                        return False
+            elif value != condition:
+                return False
+        return True
+
+    def db(self, name):
+        newobj = copy.copy(self)
+        newobj._db_name = name
+        self._dbs.setdefault(name, {})
+        return newobj
+
+    def _docs(self):
+        return self._dbs[self._db_name]
+
+    def get_docs(self, filter, limit=None):
+        docs = [copy.deepcopy(doc) for doc in self._docs().values() if InMemoryDbEngine._matches(doc, filter)]
+        return docs if limit is None else docs[:limit]
+
+    def iter_docs(self, filter, page_size=1000):
+        return iter(self.get_docs(filter))
+
+    def get_doc_by_id(self, id):
+        doc = self._docs().get(id)
+        return copy.deepcopy(doc) if doc else None
+
+    def create_doc(self, id, doc):
+        self._docs()[id] = dict(copy.deepcopy(doc), _id=id)
+
+    def update_doc(self, new_doc):
+        self._docs()[new_doc['_id']] = copy.deepcopy(new_doc)
+
+    def upsert_doc(self, id, doc):
+        self.create_doc(id, doc)
+
+    def merge_doc(self, id, fields):
+        self._docs()[id] = dict(self._docs().get(id, {'_id': id}), **copy.deepcopy(fields))
+
+    def delete_doc(self, id, rev):
+        self._docs().pop(id, None)
+
+
+class SimulatedSubmission:
+    def __init__(self, id):
+        self.id = id
+        self.permalink = f'/comments/{id}/'
+
+
+class SimulatedRedditService:
+    '''
+    Stand-in for RedditService where every submission succeeds and
+    stays on the frontpage of its subreddit for frontpage_hours
+    '''
+    def __init__(self, clock, frontpage_hours=6, last_submitted=None):
+        self._clock = clock
+        self._frontpage_hours = frontpage_hours
+        # subreddit name -> timestamp of the most recent submission
+        self._last_submitted = dict(last_submitted or {})
+        self._submission_count = 0
+
+    def _submit(self, subreddit):
+        self._submission_count += 1
+        self._last_submitted[subreddit] = self._clock.time()
+        submission = SimulatedSubmission(f'sim{self._submission_count}')
+        return submission, "https://www.reddit.com" + submission.permalink
+
+    def crosspost(self, subreddit, existing_submission_link, flair_id=None, nsfw=False):
+        return self._submit(subreddit)[1]
+
+    def post(self, subreddit, title, link, flair_id=None, nsfw=False):
+        return self._submit(subreddit)
+
+    def get_post_title(self, post_url):
+        return "title"
+
+    def get_submission_history(self, limit=1000):
+        return []
+
+    def is_on_frontpage(self, subreddit, category, threshold=10):
+        last_submitted = self._last_submitted.get(subreddit)
+        return last_submitted is not None and self._clock.time() - last_submitted < self._frontpage_hours * 3600
+
+    def reply(self, submission_id, reply_content):
+        pass
+
+
+class SimulatedExecutor(Executor):
+    '''
+    Executor recording when each post would be made and how much CPU time
+    admission control and processing take for each subreddit
+    '''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timeline = []
+        self.cpu_seconds = Counter()
+
+    def _should_post(self, record, timestamp):
+        start = time.process_time()
+        try:
+            return super()._should_post(record, timestamp)
+        finally:
+            if record:
+                self.cpu_seconds[record['_id']] += time.process_time() - start
+
+    def _process_subreddit_in_task(self, task, subreddit, operations):
+        start = time.process_time()
+        try:
+            return super()._process_subreddit_in_task(task, subreddit, operations)
+        finally:
+            self.cpu_seconds[subreddit.name] += time.process_time() - start
+
+    def _update_documents_on_success(self, task, subreddit, submission_url, operation):
+        super()._update_documents_on_success(task, subreddit, submission_url, operation)
+        self.timeline.append(ScheduledPost(self._clock.time(), task.id, subreddit.name))
+
+
+class Simulation:
+    '''
+    Replays the executor against a snapshot of the tasks / subreddits dbs
+    on a virtual clock until every task is completed or the horizon is reached
+    '''
+    def __init__(self, snapshot, start, executor_options, frontpage_hours=6):
+        self.clock = VirtualClock(start)
+        self.db = DbService(InMemoryDbEngine(snapshot))
+        self.reddit = SimulatedRedditService(
+            self.clock, frontpage_hours=frontpage_hours,
+            last_submitted={
+                record['_id']: record['lastPostedTimestamp']
+                for record in snapshot.get('subreddits', []) if 'lastPostedTimestamp' in record
+            }
+        )
+        self.executor = SimulatedExecutor(self.reddit, self.db, clock=self.clock, **executor_options)
+        self._start = start
+        self._run_interval_seconds = executor_options.get('run_interval_seconds', 3600)
+
+    def run(self, horizon_days):
+        '''
+        :returns: seconds of virtual time until all tasks were completed, None if never within the horizon
+        '''
+        end = self._start + horizon_days * 24 * 3600
+        while self.clock.time() < end:
+            self.executor.run_cycle()
+            if not self.db.task.get_uncompleted():
+                return self.clock.time() - self._start
+            self.clock.sleep(self._run_interval_seconds)
+        return None
+
+    def report(self, drain_seconds):
+        lines = ['Projected posting timeline:']
+        for post in self.executor.timeline:
+            lines.append(f'  {datetime.fromtimestamp(post.timestamp):%Y-%m-%d %H:%M}  task [{post.task_id}] -> [{post.subreddit}]')
+
+        if drain_seconds is None:
+            remaining = len(self.db.task.get_uncompleted())
+            lines.append(f'Not drained within the horizon: {remaining} tasks left uncompleted')
+        else:
+            lines.append(f'Drain time: {drain_seconds / 3600:.1f} hours for {len(self.executor.timeline)} posts')
+
+        lines.append('Per-subreddit utilization (posts, CPU seconds):')
+        posts = Counter(post.subreddit for post in self.executor.timeline)
+        for subreddit, cpu_seconds in self.executor.cpu_seconds.most_common():
+            lines.append(f'  [{subreddit}] {posts[subreddit]} posts, {cpu_seconds:.4f} s')
+        return '\n'.join(lines)
@@ -0,0 +1,80 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSnapshot:
+    '''
+    Local gzipped JSON file holding the derived state of the executor
+    (subreddit records, learned capabilities, titles, ratelimit, submission index)
+    so that a restart does not have to rebuild it from CouchDB and the Reddit API
+    '''
+    VERSION = 1
+
+    def __init__(self, path, max_age_hours=24):
+        self._path = path
+        self._max_age_hours = max_age_hours
+
+    def save(self, state, timestamp):
+        '''
+        Written to a temporary file first and renamed over the snapshot,
+        so a crash while saving never leaves a truncated snapshot behind
+        '''
+        directory = os.path.dirname(os.path.abspath(self._path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+        try:
+            with os.fdopen(fd, 'wb') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                    f.write(json.dumps({
+                        "version": ExecutorSnapshot.VERSION,
+                        "timestamp": timestamp,
+                        "state": state
+                    }, separators=(',', ':')).encode('utf-8'))
+                # the gzip trailer is only written on close, sync after it
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp_path, self._path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self, timestamp, username):
+        '''
+        :param username: account configured for praw, a snapshot saved for another account is not used
+        :returns: the saved state, None if there is no usable snapshot
+        '''
+        if not os.path.exists(self._path):
+            return None
+        try:
+            with gzip.open(self._path, 'rb') as f:
+                snapshot = json.loads(f.read().decode('utf-8'))
+        except (OSError, EOFError, ValueError) as e:
+            logger.warning(f'Ignoring unreadable snapshot [{self._path}]: {e}')
+            return None
+
+        if not (
+            isinstance(snapshot, dict) and isinstance(snapshot.get('timestamp'), (int, float))
+            and isinstance(snapshot.get('state'), dict) and 'version' in snapshot
+        ):
+            logger.warning(f'Ignoring malformed snapshot [{self._path}]')
+            return None
+
+        if snapshot.get('version') != ExecutorSnapshot.VERSION:
+            logger.warning(f'Ignoring snapshot [{self._path}] of version {snapshot.get("version")}')
+            return None
+        age_hours = (timestamp - snapshot['timestamp']) / 3600
+        if age_hours > self._max_age_hours:
+            logger.info(f'Ignoring snapshot [{self._path}] saved {age_hours:.1f} hours ago')
+            return None
+
+        saved_username = snapshot['state'].get('username')
+        if not username or str(saved_username).lower() != username.lower():
+            logger.info(f'Ignoring snapshot [{self._path}] saved for account [{saved_username}]')
+            return None
+
+        logger.info(f'Warm start from snapshot [{self._path}] saved {age_hours:.1f} hours ago')
+        return snapshot['state']
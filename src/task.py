@@ -1,5 +1,9 @@
 import copy
 
+# operation that made the submission for a subreddit
+CROSSPOST = "crosspost"
+DIRECT_POST = "direct_post"
+
 
 class Task:
     def __init__(
@@ -7,7 +11,8 @@ class Task:
         link="", crosspost_source_link="", reply_content="",
         completed=False,
         subreddits=[],
-        last_updated_timestamp="", title="", nsfw=False
+        last_updated_timestamp="", title="", nsfw=False,
+        priority=1, deadline=None, created_timestamp=""
         ):
         self.id = id
         self.link, self.crosspost_source_link, self.reply_content = link, crosspost_source_link, reply_content
@@ -16,6 +21,9 @@ class Task:
         self.last_updated_timestamp = last_updated_timestamp
         self.title = title
         self.nsfw = nsfw
+        self.priority = priority
+        self.deadline = deadline
+        self.created_timestamp = created_timestamp
 
     @classmethod
     def from_dict(cls, dict):
@@ -30,7 +38,10 @@ class Task:
             subreddits=subreddits,
             last_updated_timestamp=dict.get('last_updated_timestamp', ""),
             title=dict.get('title', ""),
-            nsfw=dict.get('nsfw', False)
+            nsfw=dict.get('nsfw', False),
+            priority=dict.get('priority', 1),
+            deadline=dict.get('deadline'),
+            created_timestamp=dict.get('created_timestamp', "")
         )
 
     @classmethod
@@ -45,8 +56,9 @@ class Task:
         # return obj.__dict__
         return return_dict
 
-    def update_on_success(self, subreddit, timestamp, post_url):
+    def update_on_success(self, subreddit, timestamp, post_url, operation=""):
         subreddit.link = post_url
+        subreddit.operation = operation
         subreddit.processed = True
         subreddit.timestamp = timestamp
 
@@ -73,15 +85,33 @@ class Task:
 
         self.last_updated_timestamp = timestamp
 
+    def update_on_skip(self, subreddit, timestamp, reason):
+        subreddit.processed = True
+        subreddit.timestamp = timestamp
+        subreddit.skip_reason = reason
+
+        # Check completeness of the whole task
+        completed = True
+        for item in self.subreddits:
+            if not item.processed:
+                completed = False
+        self.completed = completed
+
+        self.last_updated_timestamp = timestamp
+
     def __repr__(self):
         return str(self.__dict__)
 
 
 class SubredditTask:
-    def __init__(self, name, link="", timestamp="", processed=False, flair_id="", error=None):
+    def __init__(
+        self, name, link="", timestamp="", processed=False, flair_id="", error=None, skip_reason="", operation=""
+    ):
         self.name, self.processed, self.link, self.timestamp = name, processed, link, timestamp
         self.flair_id = flair_id
         self.error = error
+        self.skip_reason = skip_reason
+        self.operation = operation
 
     @classmethod
     def from_dict(cls, dict):
@@ -91,7 +121,9 @@ class SubredditTask:
             timestamp=dict.get('timestamp', ""),
             link=dict.get('link', ""),
             flair_id=dict.get('flair_id', ""),
-            error=dict.get('error', "")
+            error=dict.get('error', ""),
+            skip_reason=dict.get('skip_reason', ""),
+            operation=dict.get('operation', "")
         )
 
     @classmethod
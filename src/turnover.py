@@ -0,0 +1,53 @@
+class TurnoverEstimator:
+    '''
+    Learns how long our submissions stay on the frontpage (top hot / new listings)
+    of a subreddit from earlier frontpage checks.
+    Each observation is the age in hours of our most recent submission at the time
+    of a check, split by whether a submission of ours was still found on the frontpage
+    '''
+    # only the latest observations are kept, so the estimate follows changes in subreddit activity
+    MAX_SAMPLES = 20
+    # a prediction needs the current age to be this far off the closest contradicting observation
+    MARGIN = 1.25
+
+    def __init__(self, on_ages=None, off_ages=None):
+        self.on_ages = on_ages if on_ages is not None else []
+        self.off_ages = off_ages if off_ages is not None else []
+
+    @classmethod
+    def from_dict(cls, dict):
+        return cls(
+            on_ages=list(dict.get('on', [])),
+            off_ages=list(dict.get('off', []))
+        )
+
+    @classmethod
+    def to_dict(cls, obj):
+        return {
+            "on": obj.on_ages,
+            "off": obj.off_ages
+        }
+
+    def observe(self, age_hours, on_frontpage):
+        ages = self.on_ages if on_frontpage else self.off_ages
+        ages.append(round(age_hours, 2))
+        del ages[:-TurnoverEstimator.MAX_SAMPLES]
+
+    def predict(self, age_hours, min_samples=3):
+        '''
+        Predict whether a submission of the given age is still on the frontpage
+        :returns: True / False when confident, None when a frontpage check is needed
+        '''
+        # Submissions younger than this one had already dropped off and none ever stayed as long
+        gone_earlier = sum(1 for age in self.off_ages if age <= age_hours)
+        stayed_longest = max(self.on_ages, default=0)
+        if gone_earlier >= min_samples and stayed_longest * TurnoverEstimator.MARGIN < age_hours:
+            return False
+
+        # Submissions older than this one were still there and none dropped off this early
+        stayed_longer = sum(1 for age in self.on_ages if age >= age_hours)
+        gone_first = min(self.off_ages, default=float('inf'))
+        if stayed_longer >= min_samples and age_hours * TurnoverEstimator.MARGIN < gone_first:
+            return True
+
+        return None
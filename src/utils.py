@@ -1,7 +1,29 @@
+from datetime import datetime
 import progressbar
 import time
 
 
+# disabled when log lines must not be interleaved with a progressbar
+SHOW_PROGRESS = True
+
+
 def sleep_with_progess(sleep_secs):
+    if not SHOW_PROGRESS:
+        time.sleep(sleep_secs)
+        return
     for i in progressbar.progressbar(range(100)):
         time.sleep(sleep_secs / 100)
+
+
+class Clock:
+    '''
+    Wall clock used by the executor. Simulations replace it with a virtual one
+    '''
+    def time(self):
+        return time.time()
+
+    def now(self):
+        return datetime.fromtimestamp(self.time())
+
+    def sleep(self, sleep_secs):
+        sleep_with_progess(sleep_secs)
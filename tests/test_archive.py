@@ -0,0 +1,83 @@
+import gzip
+import json
+import pytest
+from unittest.mock import Mock
+from src.archive import TaskArchiver
+
+
+@pytest.fixture
+def completed_task_dict():
+    return {
+        "_id": "1",
+        "_rev": "1-abc",
+        "link": "https://fake-link.com",
+        "completed": True,
+        "last_updated_timestamp": 1593526695.604652,
+        "subreddits": [
+            {
+                "name": "subreddit1", "processed": True, "link": "https://fake-post.com",
+                "timestamp": 1593526695.604652, "operation": "direct_post"
+            },
+            {"name": "subreddit2", "processed": True, "error": "Some error", "timestamp": 1593526600.0}
+        ]
+    }
+
+
+@pytest.fixture
+def mock_db():
+    return Mock()
+
+
+def test_summary(completed_task_dict):
+    result = TaskArchiver._summary(completed_task_dict, "tasks-2020-07.ndjson.gz", 1593526800.0)
+
+    assert(result['_id'] == "1" and result['link'] == "https://fake-link.com")
+    assert(result['archive_file'] == "tasks-2020-07.ndjson.gz")
+    assert(result['posts'] == [
+        {
+            "subreddit": "subreddit1", "link": "https://fake-post.com",
+            "timestamp": 1593526695.604652, "operation": "direct_post"
+        }
+    ])
+
+
+def test_run(tmp_path, mock_db, completed_task_dict):
+    mock_db.task.get_completed_before.side_effect = [[completed_task_dict], []]
+    mock_db.task.file_size.return_value = 4096
+    archiver = TaskArchiver(mock_db, str(tmp_path))
+
+    archived, reclaimed = archiver.run()
+
+    # compaction is not waited for
+    assert(archived == 1 and reclaimed == 0)
+    mock_db.task.is_compacting.assert_not_called()
+    mock_db.task.delete.assert_called_with(completed_task_dict)
+    mock_db.task.compact.assert_called_once()
+    mock_db.task_archive.upsert.assert_called_once()
+
+    archive_files = list(tmp_path.iterdir())
+    assert(len(archive_files) == 1)
+    with gzip.open(archive_files[0], 'rt') as f:
+        lines = f.readlines()
+    assert(len(lines) == 1 and json.loads(lines[0])['_id'] == "1")
+
+
+def test_run_measures_finished_compaction(tmp_path, mock_db, completed_task_dict):
+    mock_db.task.get_completed_before.side_effect = [[completed_task_dict], [], [], []]
+    mock_db.task.file_size.side_effect = [4096, 1024]
+    mock_db.task.is_compacting.side_effect = [True, False]
+    archiver = TaskArchiver(mock_db, str(tmp_path))
+
+    archiver.run()
+    # still compacting
+    assert(archiver.run() == (0, 0))
+    assert(archiver.run() == (0, 3072))
+    mock_db.task.compact.assert_called_once()
+
+
+def test_run_nothing_to_archive(tmp_path, mock_db):
+    mock_db.task.get_completed_before.return_value = []
+    archiver = TaskArchiver(mock_db, str(tmp_path))
+
+    assert(archiver.run() == (0, 0))
+    mock_db.task.compact.assert_not_called()
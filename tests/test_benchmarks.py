@@ -0,0 +1,27 @@
+from benchmarks.__main__ import run_benchmarks, compare
+from benchmarks.workloads import BENCHMARKS
+
+
+def test_quick_run():
+    results = run_benchmarks(quick=True, repeat=1, rounds=1)
+
+    assert(len(results) == sum(len(quick_sizes) for _, _, quick_sizes in BENCHMARKS.values()))
+    assert(all(result["seconds"] > 0 and result["peak_bytes"] > 0 for result in results.values()))
+
+
+def test_compare():
+    baseline = {
+        "should_post[100]": {"relative_time": 1.0, "peak_bytes": 100000},
+        "get_operations[100]": {"relative_time": 1.0, "peak_bytes": 1000}
+    }
+    results = {
+        "should_post[100]": {"relative_time": 1.6, "seconds": 0.01, "peak_bytes": 200000},
+        # within noise: too fast and too little memory to count
+        "get_operations[100]": {"relative_time": 2.0, "seconds": 0.0001, "peak_bytes": 2000},
+        "task_to_dict[100]": {"relative_time": 5.0, "seconds": 0.01, "peak_bytes": 1000}
+    }
+
+    regressions = compare(results, baseline, 0.5)
+
+    assert(len(regressions) == 2)
+    assert(all(regression.startswith("should_post[100]") for regression in regressions))
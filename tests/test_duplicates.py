@@ -0,0 +1,64 @@
+import pytest
+from src.duplicates import normalize_url, SubmissionIndex
+
+
+@pytest.mark.parametrize('url', [
+    "https://fake-link.com/article",
+    "http://www.fake-link.com/article/",
+    "https://FAKE-LINK.com/article#comments",
+    "https://fake-link.com/article?utm_source=reddit&utm_medium=social",
+])
+def test_normalize_url(url):
+    assert(normalize_url(url) == "fake-link.com/article")
+
+
+def test_normalize_url_keeps_query():
+    assert(normalize_url("https://fake-link.com/watch?v=2&a=1") == "fake-link.com/watch?a=1&v=2")
+
+
+def test_build():
+    tasks = [{
+        "_id": "1",
+        "link": "https://fake-link.com",
+        "subreddits": [
+            {"name": "subreddit1", "link": "https://fake-post.com"},
+            {"name": "subreddit2", "error": "Some error"}
+        ]
+    }]
+    archived_tasks = [{
+        "_id": "0",
+        "link": "https://fake-link2.com",
+        "posts": [{
+            "subreddit": "subreddit3", "link": "https://fake-post2.com",
+            "timestamp": 1593526695.604652, "operation": "direct_post"
+        }]
+    }]
+    history = [("https://fake-link3.com", "Subreddit4")]
+
+    index = SubmissionIndex.build(tasks, archived_tasks, history)
+
+    assert(len(index) == 3)
+    assert(index.contains("https://www.fake-link.com/", "subreddit1"))
+    assert(not index.contains("https://fake-link.com", "subreddit2"))
+    assert(index.contains("https://fake-link2.com", "subreddit3"))
+    assert(index.contains("https://fake-link3.com", "subreddit4"))
+
+
+def test_build_skips_crossposts():
+    tasks = [{
+        "_id": "1",
+        "link": "https://fake-link.com",
+        "crosspost_source_link": "https://reddit.com/fake-post",
+        "subreddits": [
+            {"name": "subreddit1", "link": "https://fake-post.com", "operation": "crosspost"},
+            {"name": "subreddit2", "link": "https://fake-post2.com", "operation": "direct_post"},
+            # submitted before the operation was recorded
+            {"name": "subreddit3", "link": "https://fake-post3.com"}
+        ]
+    }]
+
+    index = SubmissionIndex.build(tasks, [], [])
+
+    assert(not index.contains("https://fake-link.com", "subreddit1"))
+    assert(index.contains("https://fake-link.com", "subreddit2"))
+    assert(not index.contains("https://fake-link.com", "subreddit3"))
@@ -1,9 +1,13 @@
 from datetime import datetime, timedelta
+import time
+import praw
 import pytest
 from unittest.mock import Mock, patch
 from src.reddit import RedditService
 from src.executor import Executor
-from src.task import Task, SubredditTask
+from src.duplicates import SubmissionIndex
+from src.capability import SubredditCapability, CROSSPOST_FORBIDDEN, FLAIR_REQUIRED, BANNED, SILENTLY_REMOVES
+from src.task import Task, SubredditTask, CROSSPOST, DIRECT_POST
 
 
 @pytest.fixture
@@ -107,6 +111,31 @@ def test_should_post_with_frontpage_check(mock_reddit, mock_executor, is_on_fron
     assert(result == expected)
 
 
+def test_post_direct_queues_reply(mock_reddit, mock_db, task_obj_no_crosspost):
+    reply_queue = Mock()
+    executor = Executor(mock_reddit, mock_db, reply_queue=reply_queue)
+    mock_reddit.post.return_value = (Mock(id="fake-id"), "fake-link")
+
+    post_url = executor._post_direct(task_obj_no_crosspost, task_obj_no_crosspost.subreddits[1])
+
+    assert(post_url == "fake-link")
+    reply_queue.put.assert_called_with("fake-id", task_obj_no_crosspost.reply_content)
+
+
+@pytest.mark.parametrize('on_ages, off_ages, expected', [([], [1, 2, 3], True), ([20, 22, 23], [], False)])
+def test_should_post_predicted_from_turnover(mock_reddit, mock_db, on_ages, off_ages, expected):
+    executor = Executor(mock_reddit, mock_db, min_reposting_delay=12, max_reposting_delay=24, turnover_verify_rate=0)
+    record = {
+        "_id": "subreddit1",
+        "lastPostedTimestamp": 1593526695.604652,
+        "turnover": {"on": on_ages, "off": off_ages}
+    }
+    result = executor._should_post(record, datetime.fromtimestamp(record['lastPostedTimestamp']) + timedelta(hours=16))
+    mock_reddit.is_on_frontpage.assert_not_called()
+    assert(result == expected)
+    assert(executor._turnover_metrics['probes_avoided'] == 1)
+
+
 def test_get_title_from_crosspost(mock_executor, mock_reddit, task_obj):
     mock_reddit.get_post_title.return_value = "fake-title"
     result = mock_executor._get_title(task_obj)
@@ -132,3 +161,115 @@ def test_get_operations_crosspost_only(mock_executor, task_obj_only_crosspost):
     result = mock_executor._get_operations(task_obj_only_crosspost)
     assert([mock_executor._crosspost] == result)
 
+
+def test_get_capability_not_learned(mock_executor, mock_db):
+    mock_db.subreddit_capability.get.return_value = None
+    capability = mock_executor._get_capability("subreddit1")
+    assert(capability.name == "subreddit1" and not capability.facts)
+
+
+def test_apply_capability_crosspost_forbidden(mock_executor, task_obj):
+    capability = SubredditCapability("subreddit2")
+    capability.learn(CROSSPOST_FORBIDDEN, time.time(), 1)
+    operations = mock_executor._get_operations(task_obj)
+    result, skip_reason = mock_executor._apply_capability(task_obj, task_obj.subreddits[1], operations, capability)
+    assert(result == [mock_executor._post_direct] and not skip_reason)
+
+
+def test_apply_capability_flair_required(mock_executor, task_obj):
+    capability = SubredditCapability("subreddit1")
+    capability.learn(FLAIR_REQUIRED, time.time(), 1)
+    operations = mock_executor._get_operations(task_obj)
+    # flair is configured for subreddit1 but not for subreddit2
+    result, skip_reason = mock_executor._apply_capability(task_obj, task_obj.subreddits[0], operations, capability)
+    assert(result == operations and not skip_reason)
+    result, skip_reason = mock_executor._apply_capability(task_obj, task_obj.subreddits[1], operations, capability)
+    assert(not result and skip_reason)
+
+
+def test_apply_capability_expired(mock_executor, task_obj):
+    capability = SubredditCapability("subreddit1")
+    capability.learn(BANNED, time.time() - 7200, 1)
+    operations = mock_executor._get_operations(task_obj)
+    result, skip_reason = mock_executor._apply_capability(task_obj, task_obj.subreddits[0], operations, capability)
+    assert(result == operations and not skip_reason)
+
+
+def test_process_subreddit_learns_crosspost_forbidden(mock_reddit, mock_db, mock_executor, task_obj):
+    mock_db.subreddit_capability.get.return_value = None
+    mock_reddit.crosspost.side_effect = praw.exceptions.RedditAPIException([["NO_CROSSPOSTS", "no crossposts", ""]])
+    mock_reddit.post.return_value = (Mock(), "fake-link")
+    mock_reddit.get_post_title.return_value = "fake-title"
+
+    operations = mock_executor._get_operations(task_obj)
+    posted = mock_executor._process_subreddit_in_task(task_obj, task_obj.subreddits[1], operations)
+
+    assert(posted)
+    assert(mock_executor._get_capability("subreddit2").has(CROSSPOST_FORBIDDEN, time.time()))
+    mock_db.subreddit_capability.upsert.assert_called_once()
+
+
+def test_apply_submission_index_falls_back_to_crosspost(mock_executor, task_obj):
+    mock_executor._submission_index = SubmissionIndex()
+    mock_executor._submission_index.add(task_obj.link, "subreddit1")
+    operations = mock_executor._get_operations(task_obj)
+
+    result, skip_reason = mock_executor._apply_submission_index(task_obj, task_obj.subreddits[0], operations)
+    assert(result == [mock_executor._crosspost] and not skip_reason)
+
+    result, skip_reason = mock_executor._apply_submission_index(task_obj, task_obj.subreddits[1], operations)
+    assert(result == operations and not skip_reason)
+
+
+def test_apply_submission_index_skip(mock_executor, task_obj_no_crosspost):
+    mock_executor._submission_index = SubmissionIndex()
+    mock_executor._submission_index.add(task_obj_no_crosspost.link, "subreddit1")
+    operations = mock_executor._get_operations(task_obj_no_crosspost)
+
+    result, skip_reason = mock_executor._apply_submission_index(task_obj_no_crosspost, task_obj_no_crosspost.subreddits[0], operations)
+    assert(not result and skip_reason)
+
+
+def test_crossposted_link_can_still_be_posted(mock_reddit, mock_executor, task_obj, task_obj_no_crosspost):
+    mock_executor._submission_index = SubmissionIndex()
+    mock_reddit.crosspost.return_value = "https://fake-crosspost.com"
+    mock_executor._process_subreddit_in_task(task_obj, task_obj.subreddits[0], mock_executor._get_operations(task_obj))
+    assert(task_obj.subreddits[0].operation == CROSSPOST)
+
+    operations = mock_executor._get_operations(task_obj_no_crosspost)
+    result, skip_reason = mock_executor._apply_submission_index(task_obj_no_crosspost, task_obj_no_crosspost.subreddits[0], operations)
+    assert(result == operations and not skip_reason)
+
+
+def test_first_post_latency(mock_executor, task_obj):
+    task_obj.created_timestamp = time.time() - 3600
+    mock_executor._update_documents_on_success(task_obj, task_obj.subreddits[0], "https://fake-post.com", DIRECT_POST)
+    mock_executor._update_documents_on_success(task_obj, task_obj.subreddits[1], "https://fake-post2.com", DIRECT_POST)
+
+    assert(len(mock_executor._first_post_latencies) == 1)
+    assert(mock_executor._first_post_latencies[0] >= 3600)
+
+
+def test_created_timestamp_saved_when_first_seen(mock_db, mock_executor, task_obj):
+    first_seen = Task.to_dict(task_obj)
+    seen_before = dict(Task.to_dict(task_obj), _id="2", created_timestamp=1593526695.604652)
+    mock_db.task.get_uncompleted.return_value = [first_seen, seen_before]
+    mock_executor._process_subreddit = Mock()
+
+    mock_executor._process_tasks()
+
+    mock_db.task.update.assert_called_once()
+    saved = mock_db.task.update.call_args[0][0]
+    assert(saved['_id'] == "1" and saved['created_timestamp'])
+
+
+def test_process_subreddit_backs_off_on_removals(mock_reddit, mock_db, mock_executor, task_obj):
+    capability = SubredditCapability("subreddit1")
+    capability.learn(SILENTLY_REMOVES, time.time(), 1)
+    mock_executor._capabilities["subreddit1"] = capability
+
+    mock_executor._process_subreddit(task_obj, task_obj.subreddits[0], mock_executor._get_operations(task_obj))
+
+    mock_db.subreddit_record.get.assert_not_called()
+    mock_reddit.crosspost.assert_not_called()
+    assert(not task_obj.subreddits[0].processed)
@@ -0,0 +1,72 @@
+import pytest
+from unittest.mock import Mock
+from src.reddit import RedditService
+from src.health import fullname_from_url, PostHealthSweeper
+
+NOW = 1596300000.0
+
+
+@pytest.fixture
+def mock_reddit():
+    return Mock(spec=RedditService)
+
+
+@pytest.fixture
+def mock_db():
+    db = Mock()
+    db.post_health.get.return_value = None
+    db.task.get_updated_since.return_value = [{
+        "_id": "1",
+        "subreddits": [
+            {"name": "subreddit1", "link": "https://www.reddit.com/r/subreddit1/comments/abc1/title/", "timestamp": NOW - 3600},
+            {"name": "subreddit1", "link": "https://www.reddit.com/r/subreddit1/comments/abc2/title/", "timestamp": NOW - 7200},
+            {"name": "subreddit2", "link": "https://www.reddit.com/r/subreddit2/comments/abc3/title/", "timestamp": NOW - 3600},
+            {"name": "subreddit3", "error": "Some error", "timestamp": NOW - 3600},
+        ]
+    }]
+    return db
+
+
+@pytest.mark.parametrize('post_url, expected', [
+    ("https://www.reddit.com/r/subreddit1/comments/hvcqse/example/", "t3_hvcqse"),
+    ("https://fake-link.com", None),
+    ("", None)
+])
+def test_fullname_from_url(post_url, expected):
+    assert(fullname_from_url(post_url) == expected)
+
+
+def test_sweep_reports_removing_subreddits(mock_reddit, mock_db):
+    mock_reddit.get_post_health.return_value = {
+        "t3_abc1": (True, 1), "t3_abc2": (True, 0), "t3_abc3": (False, 12)
+    }
+    sweeper = PostHealthSweeper(mock_reddit, mock_db, min_posts=2, removal_ratio=0.5)
+
+    result = sweeper.sweep(NOW)
+
+    assert(result == ["subreddit1"])
+    mock_reddit.get_post_health.assert_called_once()
+    assert(sorted(mock_reddit.get_post_health.call_args[0][0]) == ["t3_abc1", "t3_abc2", "t3_abc3"])
+    mock_db.post_health.upsert.assert_any_call("subreddit2", {
+        "_id": "subreddit2", "posts": {"t3_abc3": [0, 12, round(NOW)]}
+    })
+
+
+def test_sweep_needs_min_posts(mock_reddit, mock_db):
+    mock_reddit.get_post_health.return_value = {"t3_abc3": (True, 0)}
+    sweeper = PostHealthSweeper(mock_reddit, mock_db, min_posts=2)
+
+    assert(sweeper.sweep(NOW) == [])
+
+
+def test_get_post_health_batches():
+    reddit = Mock()
+    reddit.user.me.return_value.name = "fake-user"
+    reddit.info.side_effect = lambda fullnames: [
+        Mock(fullname=fullname, removed_by_category=None, banned_by=None, score=1) for fullname in fullnames
+    ]
+    service = RedditService(reddit)
+
+    result = service.get_post_health([f"t3_{i}" for i in range(250)])
+
+    assert(len(result) == 250 and reddit.info.call_count == 3)
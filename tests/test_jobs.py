@@ -0,0 +1,90 @@
+import time
+import pytest
+from unittest.mock import Mock
+from src.reddit import RedditService
+from src.jobs import ReplyQueue, ReplyWorkerPool
+
+
+@pytest.fixture
+def reply_queue(tmp_path):
+    return ReplyQueue(str(tmp_path / "replies.db"))
+
+
+@pytest.fixture
+def mock_reddit():
+    return Mock(spec=RedditService)
+
+
+def test_take_claims_due_replies(reply_queue):
+    reply_queue.put("id1", "reply1")
+    reply_queue.put("id2", "reply2")
+    reply_queue.put("id3", "reply3", delay=3600)
+
+    batch = reply_queue.take(10)
+    assert([reply.submission_id for reply in batch] == ["id1", "id2"])
+    # claimed replies are not handed out twice
+    assert(not reply_queue.take(10))
+    assert(len(reply_queue) == 3)
+
+
+def test_reply_success(mock_reddit, reply_queue):
+    reply_queue.put("id1", "reply1")
+    pool = ReplyWorkerPool(lambda: mock_reddit, reply_queue)
+
+    pool._handle(mock_reddit, reply_queue.take(1)[0])
+
+    mock_reddit.reply.assert_called_with("id1", "reply1")
+    assert(len(reply_queue) == 0)
+
+
+def test_reply_failure_backoff(mock_reddit, reply_queue):
+    reply_queue.put("id1", "reply1")
+    mock_reddit.reply.side_effect = Exception("Some error")
+    pool = ReplyWorkerPool(lambda: mock_reddit, reply_queue, retry_delay=0)
+
+    pool._handle(mock_reddit, reply_queue.take(1)[0])
+    pool._handle(mock_reddit, reply_queue.take(1)[0])
+
+    reply = reply_queue.take(1)[0]
+    assert(reply.attempts == 2)
+
+
+@pytest.mark.parametrize('attempts, expected', [(1, 300), (2, 600), (4, 2400), (10, 6 * 3600)])
+def test_backoff(mock_reddit, reply_queue, attempts, expected):
+    pool = ReplyWorkerPool(lambda: mock_reddit, reply_queue, retry_delay=300)
+    assert(pool._backoff(attempts) == expected)
+
+
+def test_reply_dropped_after_max_retries(mock_reddit, reply_queue):
+    reply_queue.put("id1", "reply1")
+    mock_reddit.reply.side_effect = Exception("Some error")
+    pool = ReplyWorkerPool(lambda: mock_reddit, reply_queue, max_retries=1, retry_delay=0)
+
+    pool._handle(mock_reddit, reply_queue.take(1)[0])
+    pool._handle(mock_reddit, reply_queue.take(1)[0])
+
+    assert(len(reply_queue) == 0)
+
+
+def test_each_worker_has_own_reddit(mock_reddit, reply_queue):
+    make_reddit = Mock(return_value=mock_reddit)
+    pool = ReplyWorkerPool(make_reddit, reply_queue, workers=2, poll_interval=0.01)
+
+    pool.start()
+    pool.stop()
+
+    assert(make_reddit.call_count == 2)
+
+
+def test_worker_survives_errors(mock_reddit, reply_queue):
+    make_reddit = Mock(side_effect=[Exception("Some error"), mock_reddit])
+    reply_queue.put("id1", "reply1")
+    pool = ReplyWorkerPool(make_reddit, reply_queue, poll_interval=0.01)
+
+    pool.start()
+    deadline = time.time() + 5
+    while len(reply_queue) and time.time() < deadline:
+        time.sleep(0.01)
+    pool.stop()
+
+    mock_reddit.reply.assert_called_with("id1", "reply1")
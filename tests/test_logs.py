@@ -0,0 +1,48 @@
+import json
+import logging
+import pytest
+from src.logs import JsonFormatter, SamplingFilter, configure_logging
+
+
+def _record(msg, *args, level=logging.INFO):
+    return logging.LogRecord("src.executor", level, __file__, 1, msg, args, None)
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    root.handlers = handlers
+    root.setLevel(level)
+    logging.getLogger("src.reddit").setLevel(logging.NOTSET)
+
+
+def test_json_formatter():
+    record = _record('Starting: Task [%s] subreddit [%s]', "1", "subreddit1")
+    result = json.loads(JsonFormatter().format(record))
+
+    assert(result['level'] == "INFO" and result['logger'] == "src.executor")
+    assert(result['event'] == 'Starting: Task [%s] subreddit [%s]')
+    assert(result['message'] == 'Starting: Task [1] subreddit [subreddit1]')
+
+
+def test_sampling_filter():
+    sampling_filter = SamplingFilter(3)
+    msg = '[Admission Control] DENIED: Most recent post on [%s]'
+
+    passed = [sampling_filter.filter(_record(msg, f"subreddit{i}")) for i in range(6)]
+
+    assert(passed == [True, False, False, True, False, False])
+    assert(sampling_filter.filter(_record(msg, "subreddit1", level=logging.WARNING)))
+    assert(sampling_filter.filter(_record('Starting: Task [%s]', "1")))
+
+
+def test_console_component_level_below_global(root_logger):
+    handlers = list(root_logger.handlers)
+    configure_logging({"level": "INFO", "levels": {"src.reddit": "DEBUG"}})
+
+    console_handler, = [handler for handler in root_logger.handlers if handler not in handlers]
+    assert(console_handler.level == logging.DEBUG and root_logger.level == logging.INFO)
+    assert(logging.getLogger("src.reddit").isEnabledFor(logging.DEBUG))
+    assert(not logging.getLogger("src.executor").isEnabledFor(logging.DEBUG))
@@ -0,0 +1,65 @@
+import pytest
+from src.task import Task, SubredditTask
+from src.scheduling import schedule, FIFO, ROUND_ROBIN, WEIGHTED_FAIR
+
+
+@pytest.fixture
+def wide_task():
+    return Task(
+        id="1",
+        link="https://fake-link.com",
+        subreddits=[SubredditTask(name=f"subreddit{i}") for i in range(4)],
+        priority=2
+    )
+
+
+@pytest.fixture
+def narrow_task():
+    return Task(
+        id="2",
+        link="https://fake-link2.com",
+        subreddits=[
+            SubredditTask(name="subreddit0", processed=True),
+            SubredditTask(name="subreddit1"),
+            SubredditTask(name="subreddit2")
+        ]
+    )
+
+
+def _order(entries):
+    return [(task.id, subreddit.name) for task, subreddit in entries]
+
+
+def test_fifo(wide_task, narrow_task):
+    result = schedule([wide_task, narrow_task], FIFO, 0, 3600)
+    assert(_order(result) == [
+        ("1", "subreddit0"), ("1", "subreddit1"), ("1", "subreddit2"), ("1", "subreddit3"),
+        ("2", "subreddit1"), ("2", "subreddit2")
+    ])
+
+
+def test_round_robin(wide_task, narrow_task):
+    result = schedule([wide_task, narrow_task], ROUND_ROBIN, 0, 3600)
+    assert(_order(result) == [
+        ("1", "subreddit0"), ("2", "subreddit1"), ("1", "subreddit1"), ("2", "subreddit2"),
+        ("1", "subreddit2"), ("1", "subreddit3")
+    ])
+
+
+def test_weighted_fair(wide_task, narrow_task):
+    result = schedule([narrow_task, wide_task], WEIGHTED_FAIR, 0, 3600)
+    assert(_order(result) == [
+        ("1", "subreddit0"), ("2", "subreddit1"), ("1", "subreddit1"),
+        ("1", "subreddit2"), ("2", "subreddit2"), ("1", "subreddit3")
+    ])
+
+
+def test_deadline_goes_first(wide_task, narrow_task):
+    narrow_task.deadline = 1800
+    result = schedule([wide_task, narrow_task], ROUND_ROBIN, 0, 3600)
+    assert(_order(result)[:2] == [("2", "subreddit1"), ("2", "subreddit2")])
+
+
+def test_unknown_policy(wide_task):
+    with pytest.raises(ValueError):
+        schedule([wide_task], "random", 0, 3600)
@@ -0,0 +1,60 @@
+from datetime import datetime
+import pytest
+from src.simulator import Simulation, InMemoryDbEngine
+
+
+@pytest.fixture
+def snapshot():
+    return {
+        "tasks": [
+            {
+                "_id": "1", "link": "https://fake-link.com", "title": "fake-title", "completed": False,
+                "subreddits": [{"name": "subreddit1"}, {"name": "subreddit2"}]
+            },
+            {
+                "_id": "2", "link": "https://fake-link2.com", "title": "fake-title", "completed": False,
+                "subreddits": [{"name": "subreddit1"}]
+            }
+        ]
+    }
+
+
+@pytest.fixture
+def executor_options():
+    return dict(running_window=(9, 23), min_reposting_delay=12, max_reposting_delay=24, run_interval_seconds=3600)
+
+
+def test_in_memory_selectors():
+    engine = InMemoryDbEngine({"tasks": [
+        {"_id": "1", "completed": True, "last_updated_timestamp": 10},
+        {"_id": "2", "completed": False, "last_updated_timestamp": 5}
+    ]}).db("tasks")
+
+    assert([doc['_id'] for doc in engine.get_docs({"completed": False})] == ["2"])
+    assert([doc['_id'] for doc in engine.get_docs({"last_updated_timestamp": {"$lt": 8}})] == ["2"])
+    assert([doc['_id'] for doc in engine.get_docs({"last_updated_timestamp": {"$gte": 10}})] == ["1"])
+    with pytest.raises(ValueError):
+        engine.get_docs({"last_updated_timestamp": {"$in": [5]}})
+
+
+def test_simulation_drains_tasks(snapshot, executor_options):
+    start = datetime(2020, 8, 1, 10, 0).timestamp()
+    simulation = Simulation(snapshot, start, executor_options)
+
+    drain_seconds = simulation.run(horizon_days=3)
+
+    timeline = simulation.executor.timeline
+    assert([(post.task_id, post.subreddit) for post in timeline] == [
+        ("1", "subreddit1"), ("1", "subreddit2"), ("2", "subreddit1")
+    ])
+    # second post to subreddit1 has to wait for the min reposting delay
+    assert(timeline[2].timestamp - timeline[0].timestamp >= 12 * 3600)
+    assert(drain_seconds is not None and drain_seconds >= 12 * 3600)
+
+
+def test_simulation_horizon(snapshot, executor_options):
+    start = datetime(2020, 8, 1, 10, 0).timestamp()
+    simulation = Simulation(snapshot, start, executor_options)
+
+    assert(simulation.run(horizon_days=0.25) is None)
+    assert("Not drained" in simulation.report(None))
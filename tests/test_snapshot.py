@@ -0,0 +1,89 @@
+import gzip
+import pytest
+from unittest.mock import Mock
+from src.executor import Executor
+from src.reddit import RateLimiter
+from src.duplicates import SubmissionIndex
+from src.capability import SubredditCapability, CROSSPOST_FORBIDDEN
+from src.snapshot import ExecutorSnapshot
+
+NOW = 1596300000.0
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    return ExecutorSnapshot(str(tmp_path / "snapshot.json.gz"), max_age_hours=24)
+
+
+@pytest.fixture
+def mock_reddit():
+    reddit = Mock()
+    reddit.username = "fake-user"
+    reddit.ratelimiter = RateLimiter()
+    return reddit
+
+
+def test_save_load(snapshot):
+    state = {"username": "fake-user", "titles": {"https://reddit.com/fake-post": "fake-title"}}
+    snapshot.save(state, NOW)
+    assert(snapshot.load(NOW + 3600, "fake-user") == state)
+
+
+def test_load_other_account(snapshot):
+    snapshot.save({"username": "fake-user"}, NOW)
+    assert(snapshot.load(NOW, "Fake-User") == {"username": "fake-user"})
+    assert(snapshot.load(NOW, "other-user") is None)
+    assert(snapshot.load(NOW, None) is None)
+
+
+def test_load_missing(snapshot):
+    assert(snapshot.load(NOW, "fake-user") is None)
+
+
+def test_load_stale(snapshot):
+    snapshot.save({"username": "fake-user"}, NOW)
+    assert(snapshot.load(NOW + 25 * 3600, "fake-user") is None)
+
+
+def test_load_corrupt(tmp_path):
+    path = tmp_path / "snapshot.json.gz"
+    path.write_bytes(b"not a snapshot")
+    assert(ExecutorSnapshot(str(path)).load(NOW, "fake-user") is None)
+
+
+def test_load_truncated(snapshot, tmp_path):
+    snapshot.save({"username": "fake-user"}, NOW)
+    path = tmp_path / "snapshot.json.gz"
+    path.write_bytes(path.read_bytes()[:-8])
+    assert(snapshot.load(NOW, "fake-user") is None)
+
+
+def test_load_malformed(tmp_path):
+    path = tmp_path / "snapshot.json.gz"
+    with gzip.open(path, 'wt') as f:
+        f.write('[1, 2, 3]')
+    assert(ExecutorSnapshot(str(path)).load(NOW, "fake-user") is None)
+
+
+def test_executor_state_round_trip(snapshot, mock_reddit):
+    executor = Executor(mock_reddit, Mock())
+    executor._subreddit_records["subreddit1"] = {"_id": "subreddit1", "lastPostedTimestamp": NOW}
+    executor._subreddit_records["subreddit2"] = None
+    executor._capabilities["subreddit1"] = SubredditCapability("subreddit1", {CROSSPOST_FORBIDDEN: NOW + 3600})
+    executor._titles["https://reddit.com/fake-post"] = "fake-title"
+    executor._submission_index = SubmissionIndex()
+    executor._submission_index.add("https://fake-link.com", "subreddit1")
+    mock_reddit.ratelimiter.block_until(NOW + 600)
+
+    snapshot.save(executor.export_state(), NOW)
+    restored_reddit = Mock(username="fake-user", ratelimiter=RateLimiter())
+    restored = Executor(restored_reddit, Mock())
+    restored.restore_state(snapshot.load(NOW, "fake-user"))
+
+    assert(restored._get_subreddit_record("subreddit1")['lastPostedTimestamp'] == NOW)
+    assert(restored._get_subreddit_record("subreddit2") is None)
+    assert(restored._get_capability("subreddit1").has(CROSSPOST_FORBIDDEN, NOW))
+    assert(restored._titles == {"https://reddit.com/fake-post": "fake-title"})
+    assert(restored._submission_index.contains("https://fake-link.com", "subreddit1"))
+    assert(restored_reddit.ratelimiter.blocked_until == NOW + 600)
+    restored._db.subreddit_record.get.assert_not_called()
@@ -1,5 +1,5 @@
 import pytest
-from src.task import Task, SubredditTask
+from src.task import Task, SubredditTask, CROSSPOST
 
 
 @pytest.fixture
@@ -70,9 +70,10 @@ def test_dict_obj_transformation(task_obj):
 
 def test_task_update_on_success(task_obj):
     task = task_obj
-    task.update_on_success(task.subreddits[0], "2020-08-01 18:32 UTC", "https://fake-post.com")
+    task.update_on_success(task.subreddits[0], "2020-08-01 18:32 UTC", "https://fake-post.com", CROSSPOST)
 
     assert(task.subreddits[0].processed)
+    assert(task.subreddits[0].operation == CROSSPOST)
     assert(task.subreddits[0].timestamp == "2020-08-01 18:32 UTC")
     assert(task.subreddits[0].link == "https://fake-post.com")
     assert(not task.subreddits[0].error)
@@ -92,3 +93,13 @@ def test_task_update_on_error(task_obj):
     assert(task.subreddits[1].processed and not task.subreddits[1].link)
     assert(task.subreddits[1].timestamp == "2020-08-01 18:33 UTC")
     assert(task.subreddits[1].error == "Some error")
+
+
+def test_task_update_on_skip(task_obj):
+    task = task_obj
+    task.update_on_skip(task.subreddits[2], "2020-08-01 18:34 UTC", "Already submitted")
+
+    assert(task.subreddits[2].processed and not task.subreddits[2].link and not task.subreddits[2].error)
+    assert(task.subreddits[2].timestamp == "2020-08-01 18:34 UTC")
+    assert(task.subreddits[2].skip_reason == "Already submitted")
+    assert(not task.completed)
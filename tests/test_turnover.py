@@ -0,0 +1,31 @@
+import pytest
+from src.turnover import TurnoverEstimator
+
+
+@pytest.fixture
+def estimator():
+    # submissions stay on the frontpage for about 2 hours
+    return TurnoverEstimator(on_ages=[0.5, 1.0, 1.5, 2.0], off_ages=[3.0, 4.0, 6.0, 8.0])
+
+
+@pytest.mark.parametrize('age_hours, expected', [(0.4, True), (2.2, None), (10, False)])
+def test_predict(estimator, age_hours, expected):
+    assert(estimator.predict(age_hours, min_samples=3) == expected)
+
+
+def test_predict_without_observations():
+    assert(TurnoverEstimator().predict(12) is None)
+
+
+def test_observe_keeps_latest_samples():
+    estimator = TurnoverEstimator()
+    for i in range(TurnoverEstimator.MAX_SAMPLES + 5):
+        estimator.observe(i, False)
+
+    assert(len(estimator.off_ages) == TurnoverEstimator.MAX_SAMPLES)
+    assert(estimator.off_ages[-1] == TurnoverEstimator.MAX_SAMPLES + 4)
+
+
+def test_dict_obj_transformation(estimator):
+    result = TurnoverEstimator.from_dict(TurnoverEstimator.to_dict(estimator))
+    assert(result.on_ages == estimator.on_ages and result.off_ages == estimator.off_ages)